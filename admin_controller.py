@@ -1,5 +1,18 @@
-from flask import session, request, flash, redirect, url_for, render_template
+from flask import session, request, flash, redirect, url_for, render_template, jsonify, \
+    Response, stream_with_context
 from .base_controller import BaseController
+from matching import MatchingEngine
+from pagination import get_page_args
+from cache import catalogue_cache
+from config import Config
+from importer import BulkImporter, iter_rows
+from score_ingest import ScoreIngestor
+from qualification_scoring import QualificationScoring, SCORE_FIELDS
+from qualification_review import QualificationReview
+from application_jobs import ADMISSION_APPROVED
+from admission_approval import AdmissionApproval
+from metrics import request_metrics
+from slow_query import slow_query_log
 from datetime import datetime
 
 class AdminController(BaseController):
@@ -7,36 +20,11 @@ class AdminController(BaseController):
         try:
             # 获取统计数据
             stats = self.dao_factory.application_dao.get_statistics()
-            stats.update({
-                'total_students': len(self.dao_factory.student_dao.get_all_with_stats()),
-                'total_teachers': len(self.dao_factory.teacher_dao.get_all_with_stats()),
-                'pending_qualifications': len(self.dao_factory.qualification_dao.get_pending_reviews())
-            })
             
-            # 获取最近活动
-            activities = []
-            
-            # 获取最近申请活动
-            applications = self.dao_factory.application_dao.get_all_with_details()
-            for app in applications[:5]:
-                activities.append({
-                    'time': app['create_time'],
-                    'type': '志愿申请',
-                    'details': f"{app['student_name']} 申请了 {app['teacher_name']} 导师"
-                })
-            
-            # 获取最近资格申请活动
-            qualifications = self.dao_factory.qualification_dao.get_all_with_details()
-            for qual in qualifications[:5]:
-                activities.append({
-                    'time': qual['create_time'],
-                    'type': '资格申请',
-                    'details': f"{qual['teacher_name']} 提交了 {qual['title']} 导师资格申请"
-                })
-            
-            # 按时间排序并限制数量
-            activities.sort(key=lambda x: x['time'], reverse=True)
-            activities = activities[:10]
+            # 计数与最近活动在数据库端一次查询完成
+            dashboard = self.dao_factory.stats_dao.get_dashboard_stats()
+            activities = dashboard.pop('activities')
+            stats.update(dashboard)
             
             return render_template('admin/dashboard.html', 
                                  stats=stats,
@@ -46,26 +34,32 @@ class AdminController(BaseController):
     
     def get_users(self):
         try:
-            users = self.dao_factory.user_dao.get_all_with_details()
-            return render_template('admin/users.html', users=users)
+            after, limit = get_page_args()
+            page = self.dao_factory.list_dao.get_users_page(after, limit)
+            return render_template('admin/users.html', users=page['items'], page=page)
         except Exception as e:
             return self.handle_error(e, '获取用户列表失败', 'admin_dashboard')
     
     def get_teachers(self):
         try:
-            teachers = self.dao_factory.teacher_dao.get_all_with_stats()
-            qualifications = self.dao_factory.qualification_dao.get_all_with_details()
+            after, limit = get_page_args()
+            page = self.dao_factory.list_dao.get_teachers_page(after, limit)
+            teachers = page['items']
+            teacher_ids = [t['id'] for t in teachers]
+            # 只加载当前页导师的资格申请
+            qualifications = self.dao_factory.list_dao.qualifications_for_teachers(teacher_ids)
             majors = self.dao_factory.major_dao.get_all()  # 获取所有专业
             
-            # 获取每个导师的专业ID列表
+            # 一次查询获取所有导师的专业ID列表
+            teacher_majors = self.dao_factory.list_dao.teacher_major_map(teacher_ids)
             for teacher in teachers:
-                teacher_majors = self.dao_factory.major_dao.get_teacher_majors(teacher['id'])
-                teacher['major_ids'] = [m['id'] for m in teacher_majors]
+                teacher['major_ids'] = teacher_majors.get(teacher['id'], [])
             
             return render_template('admin/teachers.html', 
                                  teachers=teachers,
                                  qualifications=qualifications,
-                                 majors=majors)  # 传递专业列表
+                                 majors=majors,  # 传递专业列表
+                                 page=page)
         except Exception as e:
             flash('获取导师列表失败')
             print(f"获取导师列表错误: {e}")
@@ -73,16 +67,20 @@ class AdminController(BaseController):
     
     def get_students(self):
         try:
-            students = self.dao_factory.student_dao.get_all_with_stats()
-            return render_template('admin/students.html', students=students)
+            after, limit = get_page_args()
+            page = self.dao_factory.list_dao.get_students_page(after, limit)
+            return render_template('admin/students.html', students=page['items'], page=page)
         except Exception as e:
             return self.handle_error(e, '获取学生列表失败', 'admin_dashboard')
     
     def get_qualifications(self):
         """获取导师资格申请列表"""
         try:
-            qualifications = self.dao_factory.qualification_dao.get_all_with_details()
-            return render_template('admin/qualifications.html', qualifications=qualifications)
+            after, limit = get_page_args()
+            page = self.dao_factory.list_dao.get_qualifications_page(after, limit)
+            return render_template('admin/qualifications.html',
+                                 qualifications=page['items'],
+                                 page=page)
         except Exception as e:
             print(f"获取资格申请列表错误: {e}")  # 添加错误日志
             return self.handle_error(e, '获取资格申请列表失败', 'admin_dashboard')
@@ -115,6 +113,9 @@ class AdminController(BaseController):
                     if teacher:
                         self.dao_factory.teacher_dao.update_profile(teacher['id'], {'name': name})
             
+            # 导师姓名出现在首页招生目录中
+            catalogue_cache.invalidate()
+            self.invalidate_profile()
             flash('用户信息已更新')
         except Exception as e:
             return self.handle_error(e, '更新用户失败', 'admin_users')
@@ -142,6 +143,8 @@ class AdminController(BaseController):
             # 删除用户
             self.dao_factory.user_dao.delete(user_id)
             
+            catalogue_cache.invalidate()
+            self.invalidate_profile()
             flash('用户已删除')
         except Exception as e:
             return self.handle_error(e, '删除用户失败', 'admin_users')
@@ -166,8 +169,7 @@ class AdminController(BaseController):
                 
                 # 更新导师状态
                 if status == '已通过':
-                    standards = self.dao_factory.qualification_dao.get_standards()
-                    max_students = standards[qual['review_level'].lower()]['max_students']
+                    max_students = self.dao_factory.standards.max_students(qual['review_level'])
                     
                     self.dao_factory.teacher_dao.update_qualification(
                         qual['teacher_id'],
@@ -182,6 +184,8 @@ class AdminController(BaseController):
                         max_students=0
                     )
             
+            catalogue_cache.invalidate()
+            self.invalidate_profile()
             flash('审核完成')
         except Exception as e:
             return self.handle_error(e, '审核失败', 'admin_qualifications')
@@ -223,6 +227,53 @@ class AdminController(BaseController):
         
         return redirect(url_for('admin_qualifications'))
     
+    def rescore_qualifications(self):
+        """按当前评审标准批量重新评分；dry_run 时只预览等级分布
+
+        可传入 weights / levels 预览新标准下的等级分布（只能 dry_run）；
+        update_quota 时按新等级重设已通过导师的招生名额。
+        """
+        options = request.get_json(silent=True)
+        if options is None:
+            options = {}
+        if not isinstance(options, dict):
+            return jsonify({'error': '参数错误：请求体须为 JSON 对象'}), 400
+        
+        def flag(name, default):
+            value = options.get(name, request.form.get(name, default))
+            return value is True or str(value) == '1'
+        
+        dry_run = flag('dry_run', '1')
+        update_quota = flag('update_quota', '0')
+        
+        try:
+            year = int(options.get('year') or request.form.get('year') or datetime.now().year)
+            
+            weights = None
+            if options.get('weights'):
+                weights = {field: (float(value[0]), float(value[1]))
+                           for field, value in options['weights'].items()}
+                if set(weights) != set(SCORE_FIELDS):
+                    raise ValueError(f"weights 须包含全部字段：{', '.join(SCORE_FIELDS)}")
+            levels = [(name, float(minimum)) for name, minimum in options['levels']] \
+                if options.get('levels') else None
+            
+            scoring = QualificationScoring(self.dao_factory.pool,
+                                           self.dao_factory.qualification_dao,
+                                           self.dao_factory.standards)
+            report = scoring.rescore(year, weights, levels, dry_run=dry_run,
+                                     update_quota=update_quota)
+        except (ValueError, TypeError, IndexError, AttributeError) as e:
+            return jsonify({'error': f'参数错误：{e}'}), 400
+        except Exception as e:
+            print(f"批量评分错误: {e}")
+            return jsonify({'error': '批量评分失败'}), 500
+        
+        if not dry_run and report['changed']:
+            catalogue_cache.invalidate()
+            self.invalidate_profile()
+        return jsonify(report)
+    
     def add_teacher(self):
         try:
             username = request.form.get('username').strip()
@@ -263,6 +314,7 @@ class AdminController(BaseController):
                 if major_ids:
                     self.dao_factory.major_dao.update_teacher_majors(teacher_id, major_ids)
             
+            catalogue_cache.invalidate()
             flash('教师添加成功')
         except Exception as e:
             return self.handle_error(e, '添加失败', 'admin_teachers')
@@ -283,6 +335,8 @@ class AdminController(BaseController):
             
             # 更新教师信息
             self.dao_factory.teacher_dao.update_profile(teacher_id, teacher_data)
+            catalogue_cache.invalidate()
+            self.invalidate_profile()
             flash('教师信息已更新')
         except Exception as e:
             return self.handle_error(e, '更新失败', 'admin_teachers')
@@ -331,6 +385,48 @@ class AdminController(BaseController):
         
         return redirect(url_for('admin_students'))
     
+    def import_users(self, role):
+        """从 CSV/XLSX 批量导入学生或导师账号，返回逐行错误报告"""
+        if role not in ('student', 'teacher'):
+            return jsonify({'error': '无效的用户角色'}), 400
+        
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            return jsonify({'error': '请选择要导入的文件'}), 400
+        
+        try:
+            importer = BulkImporter(self.dao_factory.pool)
+            result = importer.run(role, iter_rows(upload))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            print(f"批量导入错误: {e}")
+            return jsonify({'error': '导入失败'}), 500
+        
+        if result['imported']:
+            self.invalidate_profile()
+            catalogue_cache.invalidate()
+        return jsonify(result)
+    
+    def import_scores(self):
+        """批量导入初试/复试成绩，返回逐行错误与各专业排名"""
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            return jsonify({'error': '请选择要导入的文件'}), 400
+        
+        try:
+            ingestor = ScoreIngestor(self.dao_factory.pool)
+            result = ingestor.run(iter_rows(upload))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            print(f"成绩导入错误: {e}")
+            return jsonify({'error': '导入失败'}), 500
+        
+        if result['updated']:
+            self.invalidate_profile()
+        return jsonify(result)
+    
     def update_student(self, student_id):
         try:
             # 准备更新数据
@@ -345,6 +441,7 @@ class AdminController(BaseController):
             
             # 更新学生信息
             self.dao_factory.student_dao.update(student_id, student_data)
+            self.invalidate_profile()
             flash('学生信息已更新')
         except Exception as e:
             return self.handle_error(e, '更新失败', 'admin_students')
@@ -363,6 +460,7 @@ class AdminController(BaseController):
             self.dao_factory.student_dao.delete(student_id)
             self.dao_factory.user_dao.delete(student['user_id'])
             
+            self.invalidate_profile()
             flash('学生已删除')
         except Exception as e:
             return self.handle_error(e, '删除失败', 'admin_students')
@@ -374,10 +472,58 @@ class AdminController(BaseController):
         try:
             # 获取已通过资格审核的导师列表
             teachers = self.dao_factory.teacher_dao.get_qualified_teachers()
-            return render_template('admin/quota_allocation.html', teachers=teachers)
+            
+            # 给出总名额时附带自动分配方案
+            proposal = None
+            total, exemptions = self._get_allocation_total()
+            if total is not None:
+                proposal = self.dao_factory.quota_dao.propose_allocation(
+                    total - exemptions, self.dao_factory.standards)
+            
+            return render_template('admin/quota_allocation.html',
+                                 teachers=teachers,
+                                 proposal=proposal,
+                                 total=total,
+                                 exemptions=exemptions)
+        except ValueError as e:
+            flash(f'生成分配方案失败：{e}')
+            return redirect(url_for('admin_dashboard'))
         except Exception as e:
             return self.handle_error(e, '获取数据失败', 'admin_dashboard')
     
+    def auto_allocate_quota(self):
+        """按自动分配方案批量更新导师名额"""
+        try:
+            total, exemptions = self._get_allocation_total()
+            if total is None:
+                flash('请填写总招生数')
+                return redirect(url_for('admin_quota_allocation'))
+            
+            proposal = self.dao_factory.quota_dao.propose_allocation(
+                total - exemptions, self.dao_factory.standards)
+            self.dao_factory.quota_dao.batch_update(proposal['quotas'], datetime.now().year)
+            
+            catalogue_cache.invalidate()
+            self.invalidate_profile()
+            flash(f"已自动分配 {proposal['allocated']} 个名额，未分配 {proposal['unallocated']} 个")
+        except ValueError as e:
+            flash(f'自动分配失败：{e}')
+        except Exception as e:
+            return self.handle_error(e, '自动分配失败', 'admin_quota_allocation')
+        
+        return redirect(url_for('admin_quota_allocation'))
+    
+    def _get_allocation_total(self):
+        """读取总招生数与推免数；推免名额不参与双选分配"""
+        values = request.form if request.method == 'POST' else request.args
+        total = values.get('total', type=int)
+        if total is None:
+            total = Config.TOTAL_ENROLLMENTS
+        exemptions = values.get('exemptions', 0, type=int)
+        if total is not None and not 0 <= exemptions <= total:
+            raise ValueError('推免数应在 0 到总招生数之间')
+        return total, exemptions
+    
     def update_teacher_quota(self, teacher_id):
         """更新导师招生名额"""
         try:
@@ -391,6 +537,8 @@ class AdminController(BaseController):
             
             # 更新导师名额
             self.dao_factory.teacher_dao.update_quota(teacher_id, quota_data)
+            catalogue_cache.invalidate()
+            self.invalidate_profile()
             flash('招生名额已更新')
         except Exception as e:
             return self.handle_error(e, '更新失败', 'admin_quota_allocation')
@@ -401,20 +549,18 @@ class AdminController(BaseController):
         """批量更新导师招生名额"""
         try:
             # 获取表单数据
-            teacher_quotas = []
+            teacher_quotas = {}
             for key, value in request.form.items():
                 if key.startswith('quota_'):
-                    teacher_id = int(key.split('_')[1])
-                    teacher_quotas.append({
-                        'teacher_id': teacher_id,
-                        'max_students': int(value),
-                        'quota_status': '已分配',
-                        'quota_year': datetime.now().year
-                    })
-            
-            # 批量更新
-            self.dao_factory.teacher_dao.batch_update_quota(teacher_quotas)
+                    teacher_quotas[int(key.split('_')[1])] = int(value)
+            
+            # 一个事务内校验并批量更新
+            self.dao_factory.quota_dao.batch_update(teacher_quotas, datetime.now().year)
+            catalogue_cache.invalidate()
+            self.invalidate_profile()
             flash('招生名额已批量更新')
+        except ValueError as e:
+            flash(f'批量更新失败：{e}')
         except Exception as e:
             return self.handle_error(e, '批量更新失败', 'admin_quota_allocation')
         
@@ -448,6 +594,7 @@ class AdminController(BaseController):
                 'description': request.form.get('description', '').strip()
             }
             self.dao_factory.major_dao.create(major_data)
+            catalogue_cache.invalidate()
             flash('专业添加成功')
         except Exception as e:
             return self.handle_error(e, '添加失败', 'admin_majors')
@@ -480,6 +627,7 @@ class AdminController(BaseController):
                         values
                     )
             
+            catalogue_cache.invalidate()
             flash('专业信息已更新')
         except Exception as e:
             return self.handle_error(e, '更新失败', 'admin_majors')
@@ -489,6 +637,7 @@ class AdminController(BaseController):
         """删除专业"""
         try:
             self.dao_factory.major_dao.delete(major_id)
+            catalogue_cache.invalidate()
             flash('专业已删除')
         except Exception as e:
             return self.handle_error(e, '删除失败', 'admin_majors')
@@ -499,6 +648,7 @@ class AdminController(BaseController):
         try:
             major_ids = request.form.getlist('major_ids[]')
             self.dao_factory.major_dao.update_teacher_majors(teacher_id, major_ids)
+            catalogue_cache.invalidate()
             flash('导师专业已更新')
         except Exception as e:
             return self.handle_error(e, '更新失败', 'admin_teachers')
@@ -523,16 +673,7 @@ class AdminController(BaseController):
                 
                 # 更新导师状态
                 if status == '已通过':
-                    standards = self.dao_factory.qualification_dao.get_standards()
-                    # 将中文评级转换为英文键名
-                    level_map = {
-                        '优秀': 'excellent',
-                        '良好': 'good',
-                        '合格': 'qualified',
-                        '不合格': 'unqualified'
-                    }
-                    level_key = level_map.get(qual['review_level'], 'unqualified')
-                    max_students = standards[level_key]['max_students']
+                    max_students = self.dao_factory.standards.max_students(qual['review_level'])
                     
                     self.dao_factory.teacher_dao.update_qualification(
                         qual['teacher_id'],
@@ -547,6 +688,8 @@ class AdminController(BaseController):
                         max_students=0
                     )
             
+            catalogue_cache.invalidate()
+            self.invalidate_profile()
             flash('审核完成')
         except Exception as e:
             print(f"审核资格申请错误: {e}")  # 添加错误日志
@@ -554,6 +697,94 @@ class AdminController(BaseController):
         
         return redirect(url_for('admin_qualifications'))
     
+    def batch_review_qualifications(self):
+        """批量审核导师资格申请，返回逐项结果
+
+        支持 JSON {'items': [{'qual_id', 'status', 'comment'}]}，
+        或表单 qual_ids[] 加统一的 status/review_comment。
+        """
+        try:
+            data = request.get_json(silent=True)
+            if data:
+                items = [(int(item['qual_id']), item.get('status'), item.get('comment', ''))
+                         for item in data.get('items', [])]
+            else:
+                status = request.form.get('status')
+                comment = request.form.get('review_comment', '')
+                items = [(int(qual_id), status, comment)
+                         for qual_id in request.form.getlist('qual_ids[]')]
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'error': '参数错误'}), 400
+        
+        if not items:
+            return jsonify({'error': '请选择要审核的申请'}), 400
+        
+        try:
+            review = QualificationReview(self.dao_factory.pool, self.dao_factory.standards)
+            results = review.review_many(items, session['user_id'])
+        except Exception as e:
+            print(f"批量审核错误: {e}")
+            return jsonify({'error': '批量审核失败'}), 500
+        
+        catalogue_cache.invalidate()
+        self.invalidate_profile()
+        return jsonify({
+            'succeeded': sum(1 for r in results if r['ok']),
+            'failed': sum(1 for r in results if not r['ok']),
+            'results': results
+        })
+    
+    def get_quota_stats(self):
+        """名额预占的争用统计"""
+        return jsonify(self.dao_factory.quota_reservation.stats())
+    
+    def get_metrics(self):
+        """请求延迟、SQL 次数直方图与连接池状态（Prometheus 文本格式）"""
+        gauges = {f'db_pool_{key}': value
+                  for key, value in self.dao_factory.pool.stats().items()}
+        return Response(request_metrics.render_prometheus(gauges),
+                        mimetype='text/plain; version=0.0.4')
+    
+    def get_slow_queries(self):
+        """慢查询记录：按语句指纹汇总的排行与最近的明细"""
+        return jsonify({
+            'threshold_ms': slow_query_log.threshold_ms,
+            'top': slow_query_log.top(),
+            'entries': slow_query_log.entries()
+        })
+    
+    def clear_slow_queries(self):
+        slow_query_log.clear()
+        return jsonify({'cleared': True})
+    
+    def get_job_stats(self):
+        """后台任务队列的深度、重试与死信统计"""
+        try:
+            stats = self.dao_factory.jobs.stats()
+            stats['dead_letters'] = self.dao_factory.jobs.dead_letters(limit=20)
+            return jsonify(stats)
+        except Exception as e:
+            print(f"获取任务统计错误: {e}")
+            return jsonify({'error': '获取任务统计失败'}), 500
+    
+    def retry_job(self, job_id):
+        """重新执行死信任务"""
+        try:
+            if self.dao_factory.jobs.retry(job_id):
+                flash('任务已重新加入队列')
+            else:
+                flash('任务不存在或不在死信状态')
+        except Exception as e:
+            return self.handle_error(e, '操作失败', 'admin_dashboard')
+        
+        return redirect(url_for('admin_dashboard'))
+    
+    def reload_standards(self):
+        """评审标准变更后刷新缓存"""
+        self.dao_factory.standards.invalidate()
+        flash('评审标准已刷新')
+        return redirect(url_for('admin_qualifications'))
+    
     def get_logs(self):
         """获取操作日志页面"""
         try:
@@ -563,16 +794,21 @@ class AdminController(BaseController):
             start_date = request.args.get('start_date')
             end_date = request.args.get('end_date')
             
+            after, limit = get_page_args()
+            
             # 获取日志数据
-            logs = self.dao_factory.log_dao.get_logs_with_details(
+            page = self.dao_factory.log_query.page(
                 table_name=table_name,
                 operation_type=operation_type,
                 start_date=start_date,
-                end_date=end_date
+                end_date=end_date,
+                after=after,
+                limit=limit
             )
             
             return render_template('admin/logs.html', 
-                                 logs=logs,
+                                 logs=page['items'],
+                                 page=page,
                                  table_name=table_name,
                                  operation_type=operation_type,
                                  start_date=start_date,
@@ -580,14 +816,35 @@ class AdminController(BaseController):
         except Exception as e:
             return self.handle_error(e, '获取日志失败', 'admin_dashboard')
     
+    def export_logs(self):
+        """流式导出操作日志（CSV 或 JSONL）"""
+        filters = {
+            'table_name': request.args.get('table'),
+            'operation_type': request.args.get('type'),
+            'start_date': request.args.get('start_date'),
+            'end_date': request.args.get('end_date')
+        }
+        
+        log_query = self.dao_factory.log_query
+        if request.args.get('format') == 'jsonl':
+            body = log_query.export_jsonl(**filters)
+            mimetype, filename = 'application/x-ndjson', 'logs.jsonl'
+        else:
+            body = log_query.export_csv(**filters)
+            mimetype, filename = 'text/csv', 'logs.csv'
+        
+        return Response(stream_with_context(body),
+                        mimetype=mimetype,
+                        headers={'Content-Disposition': f'attachment; filename={filename}'})
+    
     def approve_admission(self, app_id):
         """审批录取结果"""
         try:
             status = request.form['status']
             comment = request.form.get('comment', '')
             
-            # 更新审批状态
-            with self.dao_factory.application_dao.transaction_context() as cursor:
+            # 更新审批状态；通知与日志的后台任务随同一事务提交
+            with self.dao_factory.pool.transaction_context() as cursor:
                 sql = '''
                     UPDATE student_applications 
                     SET approval_status = %s,
@@ -597,6 +854,12 @@ class AdminController(BaseController):
                     WHERE id = %s
                 '''
                 cursor.execute(sql, (status, comment, session['user_id'], app_id))
+                self.dao_factory.jobs.enqueue(ADMISSION_APPROVED, {
+                    'app_id': app_id,
+                    'comment': comment,
+                    'operator_id': session['user_id']
+                }, cursor=cursor)
+            self.dao_factory.jobs.wake()
             
             flash('审批完成')
         except Exception as e:
@@ -604,6 +867,50 @@ class AdminController(BaseController):
         
         return redirect(url_for('admin_admissions'))
     
+    def batch_approve_admissions(self):
+        """批量审批录取结果，返回更新数与被跳过的申请
+
+        支持 JSON {'app_ids': [...], 'status', 'comment'} 或
+        {'all': true, 'teacher_id'?, 'status', 'comment'}（审批全部符合条件的待审批申请），
+        也支持同名表单字段（app_ids[]、all=1）。
+        """
+        data = request.get_json(silent=True)
+        if data is None:
+            data = {
+                'app_ids': request.form.getlist('app_ids[]'),
+                'all': request.form.get('all') == '1',
+                'teacher_id': request.form.get('teacher_id'),
+                'status': request.form.get('status'),
+                'comment': request.form.get('comment', '')
+            }
+        
+        approval = AdmissionApproval(self.dao_factory.pool, self.dao_factory.jobs)
+        try:
+            if data.get('all'):
+                teacher_id = data.get('teacher_id')
+                app_ids = approval.pending_ids(int(teacher_id) if teacher_id else None)
+            else:
+                app_ids = [int(app_id) for app_id in data.get('app_ids') or []]
+        except (TypeError, ValueError):
+            return jsonify({'error': '参数错误'}), 400
+        except Exception as e:
+            print(f"批量审批错误: {e}")
+            return jsonify({'error': '批量审批失败'}), 500
+        
+        if not app_ids:
+            return jsonify({'requested': 0, 'updated': 0, 'skipped': []})
+        
+        try:
+            result = approval.approve(app_ids, data.get('status'),
+                                      data.get('comment') or '', session['user_id'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            print(f"批量审批错误: {e}")
+            return jsonify({'error': '批量审批失败'}), 500
+        
+        return jsonify(result)
+    
     def get_supervision(self):
         """获取过程监督页面"""
         try:
@@ -613,23 +920,25 @@ class AdminController(BaseController):
             # 获取所有阶段
             all_phases = self.dao_factory.supervision_dao.get_all_phases()
             
-            # 获取统计数据
+            # 获取统计数据（一次 GROUP BY 查询）
             stats = {}
             if current_phase:
+                app_stats = self.dao_factory.stats_dao.get_application_stats()
                 if current_phase['phase'] == '学生申请':
                     stats = {
-                        'total_applications': len(self.dao_factory.application_dao.get_all_with_details()),
-                        'pending_reviews': len([a for a in self.dao_factory.application_dao.get_all_with_details() 
-                                             if a['status'] == '待处理'])
+                        'total_applications': app_stats['total'],
+                        'pending_reviews': app_stats['pending_reviews']
                     }
                 elif current_phase['phase'] == '导师审核':
                     stats = {
-                        'pending_reviews': len([a for a in self.dao_factory.application_dao.get_all_with_details() 
-                                             if a['status'] == '待处理'])
+                        'pending_reviews': app_stats['pending_reviews'],
+                        'accepted': app_stats['by_status'].get('已通过', 0),
+                        'rejected': app_stats['by_status'].get('未通过', 0)
                     }
                 elif current_phase['phase'] == '管理员审批':
                     stats = {
-                        'pending_approvals': len(self.dao_factory.application_dao.get_pending_approvals())
+                        'pending_approvals': app_stats['pending_approvals'],
+                        'by_approval': app_stats['by_approval']
                     }
             
             return render_template('admin/supervision.html',
@@ -680,18 +989,47 @@ class AdminController(BaseController):
     def get_admissions(self):
         """获取导师通过的申请页面"""
         try:
-            # 获取需要审批的申请
-            applications = self.dao_factory.application_dao.get_pending_approvals()
+            # 获取需要审批的申请（分页）
+            after, limit = get_page_args()
+            page = self.dao_factory.list_dao.get_admissions_page(after, limit)
             
-            # 获取统计信息
-            stats = {
-                'total': len(applications),
-                'approved': len([a for a in applications if a['status'] == '已通过']),
-                'pending': len([a for a in applications if a['approval_status'] == '待审批'])
-            }
+            # 获取统计信息（一次条件聚合查询）
+            stats = self.dao_factory.stats_dao.get_admission_stats()
             
             return render_template('admin/admissions.html', 
-                                 applications=applications,
+                                 applications=page['items'],
+                                 page=page,
                                  stats=stats)
         except Exception as e:
-            return self.handle_error(e, '获取数据失败', 'admin_dashboard')
\ No newline at end of file
+            return self.handle_error(e, '获取数据失败', 'admin_dashboard')
+    
+    def run_matching(self):
+        """批量双选匹配，dry_run 时只返回匹配方案"""
+        dry_run = request.form.get('dry_run', '1') == '1'
+        try:
+            engine = MatchingEngine(self.dao_factory.pool, self.dao_factory.jobs)
+            result = engine.run(dry_run=dry_run, operator_id=session['user_id'])
+        except Exception as e:
+            if dry_run:
+                print(f"双选匹配错误: {e}")
+                return jsonify({'error': '匹配失败'}), 500
+            return self.handle_error(e, '匹配失败', 'admin_admissions')
+        
+        if dry_run:
+            return jsonify({
+                'stats': result['stats'],
+                'matches': [{
+                    'app_id': app['id'],
+                    'student_id': app['student_id'],
+                    'student_name': app['student_name'],
+                    'teacher_id': app['teacher_id'],
+                    'teacher_name': app['teacher_name'],
+                    'priority': app['priority']
+                } for app in result['matches']],
+                'unmatched_students': result['unmatched_students']
+            })
+        
+        stats = result['stats']
+        flash(f"匹配完成：录取 {stats['accepted']} 人，未录取申请 {stats['rejected']} 条，"
+              f"跳过 {stats['skipped']} 条已被处理的申请")
+        return redirect(url_for('admin_admissions'))
@@ -0,0 +1,97 @@
+from application_jobs import ADMISSION_APPROVED
+
+APPROVAL_STATUSES = ('已通过', '未通过')
+
+
+class AdmissionApproval:
+    """录取结果的批量审批
+
+    按块处理，每块一个事务：先锁定该块的申请行（SELECT ... FOR UPDATE），
+    仍处于“导师已通过、待审批”状态的用一条 UPDATE 批量审批，
+    其余（不存在或已被并发修改）作为跳过项返回。每块写入一条后台任务负责通知与日志。
+    """
+
+    CHUNK_SIZE = 1000
+
+    def __init__(self, pool, jobs=None):
+        self.pool = pool
+        self.jobs = jobs
+
+    def pending_ids(self, teacher_id: int = None) -> list:
+        """当前全部待审批申请的 id（“全部符合筛选条件”时使用）"""
+        sql = '''
+            SELECT id FROM student_applications
+            WHERE status = '已通过' AND approval_status = '待审批'
+        '''
+        params = []
+        if teacher_id:
+            sql += ' AND teacher_id = %s'
+            params.append(teacher_id)
+        return [row['id'] for row in self.pool.query_all(sql + ' ORDER BY id', params)]
+
+    def approve(self, app_ids: list, status: str, comment: str, approver_id: int) -> dict:
+        """批量审批，返回 {'requested', 'updated', 'skipped': [...]}
+
+        跳过项为 {'app_id', 'reason', 'status', 'approval_status'}，
+        reason 为 not_found（申请不存在）或 changed（状态已被修改）。
+        """
+        if status not in APPROVAL_STATUSES:
+            raise ValueError('无效的审批状态')
+
+        app_ids = list(dict.fromkeys(app_ids))
+        updated = 0
+        skipped = []
+        for i in range(0, len(app_ids), self.CHUNK_SIZE):
+            chunk = app_ids[i:i + self.CHUNK_SIZE]
+            chunk_updated, chunk_skipped = self._approve_chunk(chunk, status, comment, approver_id)
+            updated += chunk_updated
+            skipped.extend(chunk_skipped)
+
+        if updated and self.jobs is not None:
+            self.jobs.wake()
+        return {'requested': len(app_ids), 'updated': updated, 'skipped': skipped}
+
+    def _approve_chunk(self, chunk, status, comment, approver_id):
+        placeholders = ', '.join(['%s'] * len(chunk))
+        with self.pool.transaction_context() as cursor:
+            cursor.execute(f'''
+                SELECT id, status, approval_status
+                FROM student_applications
+                WHERE id IN ({placeholders})
+                FOR UPDATE
+            ''', chunk)
+            current = {row['id']: row for row in cursor.fetchall()}
+
+            eligible, skipped = [], []
+            for app_id in chunk:
+                row = current.get(app_id)
+                if row is None:
+                    skipped.append({'app_id': app_id, 'reason': 'not_found',
+                                    'status': None, 'approval_status': None})
+                elif row['status'] != '已通过' or row['approval_status'] != '待审批':
+                    skipped.append({'app_id': app_id, 'reason': 'changed',
+                                    'status': row['status'],
+                                    'approval_status': row['approval_status']})
+                else:
+                    eligible.append(app_id)
+
+            if not eligible:
+                return 0, skipped
+
+            placeholders = ', '.join(['%s'] * len(eligible))
+            updated = cursor.execute(f'''
+                UPDATE student_applications
+                SET approval_status = %s,
+                    approval_comment = %s,
+                    approval_time = CURRENT_TIMESTAMP,
+                    approver_id = %s
+                WHERE id IN ({placeholders})
+            ''', [status, comment, approver_id] + eligible)
+
+            if self.jobs is not None:
+                self.jobs.enqueue(ADMISSION_APPROVED, {
+                    'app_ids': eligible,
+                    'comment': comment,
+                    'operator_id': approver_id
+                }, cursor=cursor)
+        return updated, skipped
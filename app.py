@@ -5,21 +5,59 @@ from controllers.student_controller import StudentController
 from controllers.teacher_controller import TeacherController
 from controllers.admin_controller import AdminController
 from utils import login_required, role_required
-from pymysql.cursors import DictCursor
+from db_pool import ConnectionPool, use_pool
+from stats_dao import StatsDAO
+from list_dao import ListDAO
+from log_query import LogQuery
+from request_cache import request_cached, request_cache_stats
+from cache import catalogue_cache
+from eligibility_dao import EligibilityDAO, next_priority
+from quota import QuotaDAO, QuotaReservation
+from standards import StandardsRegistry
+from jobs import JobQueue
+from application_jobs import register_application_jobs, ensure_tables
+from metrics import request_metrics, InstrumentedCursor
+from config import Config
 import json
 
 app = Flask(__name__)
 app.secret_key = 'your_secret_key'  # 请更改为随机密钥
 
-# 创建DAO工厂实例
-dao_factory = DAOFactory({
+# 数据库配置
+db_config = {
     'host': 'localhost',
     'user': 'root',
     'password': 'Qwe!@#123',
     'db': 'yjsds2',
     'charset': 'utf8mb4',
-    'cursorclass': DictCursor
-})
+    'cursorclass': InstrumentedCursor  # DictCursor，附带耗时与行数统计
+}
+
+# 创建连接池，每个请求在首次访问数据库时借出一条连接，请求结束时归还
+db_pool = ConnectionPool(db_config, **Config.DB_POOL)
+
+# 创建DAO工厂实例
+dao_factory = DAOFactory(db_config)
+# 原有 DAO 的事务、查询与游标也从连接池取连接
+use_pool(dao_factory, db_pool)
+
+# 基于连接池的扩展 DAO
+dao_factory.pool = db_pool
+dao_factory.stats_dao = StatsDAO(db_pool)
+dao_factory.list_dao = ListDAO(db_pool)
+dao_factory.log_query = LogQuery(db_pool)
+dao_factory.eligibility_dao = EligibilityDAO(db_pool)
+dao_factory.quota_dao = QuotaDAO(db_pool, Config.TOTAL_ENROLLMENTS)
+dao_factory.standards = StandardsRegistry(dao_factory.qualification_dao.get_standards,
+                                         Config.STANDARDS_TTL)
+
+# 后台任务队列：录取级联、通知与日志在请求返回后异步执行
+job_queue = JobQueue(db_pool, **Config.JOB_QUEUE)
+register_application_jobs(job_queue)
+dao_factory.jobs = job_queue
+dao_factory.quota_reservation = QuotaReservation(db_pool, job_queue)
+# 建表由工作线程完成，数据库暂时不可用时自动重试
+job_queue.start(setup=ensure_tables)
 
 # 创建Controller实例
 auth_controller = AuthController(dao_factory)
@@ -29,7 +67,8 @@ admin_controller = AdminController(dao_factory)
 
 @app.route('/')
 def index():
-    majors = dao_factory.major_dao.get_with_teachers()
+    # 招生目录快照由管理端写操作失效，TTL 兜底
+    majors = catalogue_cache.get_or_load('majors', dao_factory.major_dao.get_with_teachers)
     return render_template('index.html', majors=majors)
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -161,6 +200,12 @@ def admin_update_qualification(qual_id):
 def admin_add_qualification():
     return admin_controller.add_qualification()
 
+@app.route('/admin/qualification/rescore', methods=['POST'])
+@login_required
+@role_required(['admin'])
+def admin_rescore_qualifications():
+    return admin_controller.rescore_qualifications()
+
 @app.route('/admin/teacher/add', methods=['POST'])
 @login_required
 @role_required(['admin'])
@@ -191,6 +236,18 @@ def admin_update_student(student_id):
 def admin_delete_student(student_id):
     return admin_controller.delete_student(student_id)
 
+@app.route('/admin/import/<any(student, teacher):role>', methods=['POST'])
+@login_required
+@role_required(['admin'])
+def admin_import_users(role):
+    return admin_controller.import_users(role)
+
+@app.route('/admin/scores/import', methods=['POST'])
+@login_required
+@role_required(['admin'])
+def admin_import_scores():
+    return admin_controller.import_scores()
+
 @app.route('/admin/quota_allocation')
 @login_required
 @role_required(['admin'])
@@ -209,6 +266,12 @@ def admin_update_teacher_quota(teacher_id):
 def admin_batch_update_quota():
     return admin_controller.batch_update_quota()
 
+@app.route('/admin/teacher/quota/auto', methods=['POST'])
+@login_required
+@role_required(['admin'])
+def admin_auto_allocate_quota():
+    return admin_controller.auto_allocate_quota()
+
 @app.route('/admin/majors')
 @login_required
 @role_required(['admin'])
@@ -245,12 +308,30 @@ def admin_update_teacher_majors(teacher_id):
 def admin_review_qualification(qual_id):
     return admin_controller.review_qualification(qual_id)
 
+@app.route('/admin/qualification/review/batch', methods=['POST'])
+@login_required
+@role_required(['admin'])
+def admin_batch_review_qualifications():
+    return admin_controller.batch_review_qualifications()
+
+@app.route('/admin/qualification/standards/reload', methods=['POST'])
+@login_required
+@role_required(['admin'])
+def admin_reload_standards():
+    return admin_controller.reload_standards()
+
 @app.route('/admin/logs')
 @login_required
 @role_required(['admin'])
 def admin_logs():
     return admin_controller.get_logs()
 
+@app.route('/admin/logs/export')
+@login_required
+@role_required(['admin'])
+def admin_export_logs():
+    return admin_controller.export_logs()
+
 @app.route('/admin/supervision')
 @login_required
 @role_required(['admin'])
@@ -281,6 +362,90 @@ def admin_admissions():
 def admin_approve_admission(app_id):
     return admin_controller.approve_admission(app_id)
 
+@app.route('/admin/admissions/approve/batch', methods=['POST'])
+@login_required
+@role_required(['admin'])
+def admin_batch_approve_admissions():
+    return admin_controller.batch_approve_admissions()
+
+@app.route('/admin/matching/run', methods=['POST'])
+@login_required
+@role_required(['admin'])
+def admin_run_matching():
+    return admin_controller.run_matching()
+
+@app.route('/admin/quota/stats')
+@login_required
+@role_required(['admin'])
+def admin_quota_stats():
+    return admin_controller.get_quota_stats()
+
+@app.route('/admin/jobs/stats')
+@login_required
+@role_required(['admin'])
+def admin_job_stats():
+    return admin_controller.get_job_stats()
+
+@app.route('/admin/jobs/<int:job_id>/retry', methods=['POST'])
+@login_required
+@role_required(['admin'])
+def admin_retry_job(job_id):
+    return admin_controller.retry_job(job_id)
+
+@app.route('/admin/metrics')
+@login_required
+@role_required(['admin'])
+def admin_metrics():
+    return admin_controller.get_metrics()
+
+@app.route('/admin/slow-queries')
+@login_required
+@role_required(['admin'])
+def admin_slow_queries():
+    return admin_controller.get_slow_queries()
+
+@app.route('/admin/slow-queries/clear', methods=['POST'])
+@login_required
+@role_required(['admin'])
+def admin_clear_slow_queries():
+    return admin_controller.clear_slow_queries()
+
+@app.before_request
+def start_request_metrics():
+    request_metrics.begin_request()
+
+@app.before_request
+def bind_db_connection():
+    # 首次访问数据库时才借出连接
+    db_pool.bind_lazily()
+
+@app.after_request
+def report_request_cache(response):
+    stats = request_cache_stats()
+    if stats['hits'] or stats['misses']:
+        response.headers['X-Request-Cache'] = f"hits={stats['hits']}; misses={stats['misses']}"
+    return response
+
+@app.after_request
+def record_request_metrics(response):
+    return request_metrics.end_request(response)
+
+@app.teardown_request
+def release_db_connection(exc):
+    db_pool.release_current()
+
+@app.cli.command('init-log-indexes')
+def init_log_indexes():
+    """创建操作日志查询所需的索引"""
+    created = dao_factory.log_query.ensure_indexes()
+    print(f"已创建索引: {', '.join(created)}" if created else '索引已存在')
+
+@app.cli.command('init-job-tables')
+def init_job_tables():
+    """创建后台任务表与通知表"""
+    ensure_tables(job_queue)
+    print('后台任务表与通知表已就绪')
+
 # 错误处理
 @app.errorhandler(404)
 def page_not_found(e):
@@ -300,6 +465,7 @@ def from_json(value):
         return []
 
 @app.template_filter('get_available_priority')
+@request_cached
 def get_available_priority(student_id):
     """获取学生当前可申请的志愿顺序"""
     if not student_id:
@@ -312,20 +478,8 @@ def get_available_priority(student_id):
         ORDER BY create_time DESC
         LIMIT 1
     '''
-    result = dao_factory.student_dao.query_one(sql, (student_id,))
-    
-    if not result:
-        return 1  # 第一次申请
-    
-    if result['status'] == '待处理':
-        return 0  # 不能申请
-    elif result['status'] == '已通过':
-        return 0  # 不能申请
-    elif result['status'] == '未通过':
-        next_priority = result['priority'] + 1
-        return next_priority if next_priority <= 3 else 0
-    
-    return 0  # 默认不能申请
+    result = db_pool.query_one(sql, (student_id,))
+    return next_priority(result)
 
 if __name__ == '__main__':
     app.run(debug=True) 
\ No newline at end of file
@@ -0,0 +1,169 @@
+"""申请处理的后台任务：录取后的级联拒绝、通知分发与操作日志
+
+录取/拒绝/审批在请求内只提交核心 UPDATE 和一条任务记录，
+其余副作用由 JobQueue 的工作线程异步完成。每个处理函数都在任务自己的事务中执行，
+可以安全重试。
+"""
+
+from collections import defaultdict
+
+APPLICATION_ACCEPTED = 'application.accepted'
+APPLICATION_REJECTED = 'application.rejected'
+ADMISSION_APPROVED = 'admission.approved'
+NOTIFY = 'notify'
+OPERATION_LOG = 'operation_log'
+
+NOTIFICATIONS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS notifications (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        user_id INT NOT NULL,
+        title VARCHAR(100) NOT NULL,
+        content TEXT,
+        is_read TINYINT(1) NOT NULL DEFAULT 0,
+        create_time DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        INDEX idx_notifications_user (user_id, is_read)
+    ) DEFAULT CHARSET=utf8mb4
+'''
+
+# 取申请双方的用户 id 与姓名
+APPLICATION_PARTIES_SQL = '''
+    SELECT sa.id, sa.student_id, sa.status, sa.approval_status,
+           s.user_id AS student_user_id, s.name AS student_name,
+           t.user_id AS teacher_user_id, t.name AS teacher_name
+    FROM student_applications sa
+    JOIN students s ON s.id = sa.student_id
+    JOIN teachers t ON t.id = sa.teacher_id
+    WHERE sa.id = %s
+'''
+
+
+def ensure_tables(queue):
+    """创建任务表与通知表"""
+    queue.ensure_table()
+    with queue.pool.transaction_context() as cursor:
+        cursor.execute(NOTIFICATIONS_TABLE_SQL)
+
+
+def register_application_jobs(queue):
+    """在队列上注册申请相关的任务处理函数"""
+
+    def parties(cursor, app_ids):
+        placeholders = ', '.join(['%s'] * len(app_ids))
+        cursor.execute(APPLICATION_PARTIES_SQL.replace('sa.id = %s', f'sa.id IN ({placeholders})'),
+                       app_ids)
+        return cursor.fetchall()
+
+    def flush(cursor, messages, entries):
+        if messages:
+            queue.enqueue(NOTIFY, {'messages': messages}, cursor=cursor)
+        if entries:
+            queue.enqueue(OPERATION_LOG, {'entries': entries}, cursor=cursor)
+
+    def entry(operator_id, operation_type, record_id, content):
+        return {
+            'user_id': operator_id,
+            'table_name': 'student_applications',
+            'operation_type': operation_type,
+            'record_id': record_id,
+            'content': content
+        }
+
+    @queue.register(APPLICATION_ACCEPTED)
+    def on_accepted(cursor, payload):
+        """拒绝被录取学生的其他待处理申请，并通知学生与相关导师
+
+        双选匹配按块写入时 payload 带 app_ids，合并为一条通知任务和一条日志任务。
+        """
+        app_ids = payload.get('app_ids') or [payload['app_id']]
+        apps = parties(cursor, app_ids)
+        if not apps:
+            return
+
+        student_ids = list({app['student_id'] for app in apps})
+        cursor.execute(f'''
+            SELECT sa.id, sa.student_id, t.user_id AS teacher_user_id
+            FROM student_applications sa
+            JOIN teachers t ON t.id = sa.teacher_id
+            WHERE sa.student_id IN ({', '.join(['%s'] * len(student_ids))})
+            AND sa.id NOT IN ({', '.join(['%s'] * len(app_ids))})
+            AND sa.status = '待处理'
+            FOR UPDATE
+        ''', student_ids + list(app_ids))
+        others = defaultdict(list)
+        for row in cursor.fetchall():
+            others[row['student_id']].append(row)
+        other_ids = [row['id'] for rows in others.values() for row in rows]
+        if other_ids:
+            placeholders = ', '.join(['%s'] * len(other_ids))
+            cursor.execute(f'''
+                UPDATE student_applications
+                SET status = '未通过',
+                    process_time = CURRENT_TIMESTAMP,
+                    process_comment = '已被其他导师录取'
+                WHERE id IN ({placeholders}) AND status = '待处理'
+            ''', other_ids)
+
+        messages, entries = [], []
+        for app in apps:
+            closed = others.get(app['student_id'], [])
+            if app['student_user_id']:
+                messages.append((app['student_user_id'], '录取通知',
+                                 f"{app['teacher_name']} 老师已接受你的申请，等待学院审批"))
+            messages.extend(
+                (row['teacher_user_id'], '申请撤销通知',
+                 f"学生 {app['student_name']} 已被其他导师录取，其向您提交的申请已自动关闭")
+                for row in closed if row['teacher_user_id'])
+            entries.append(entry(payload.get('operator_id'), '录取', app['id'],
+                                 f"录取学生 {app['student_name']}，级联拒绝 {len(closed)} 条申请"))
+        flush(cursor, messages, entries)
+
+    @queue.register(APPLICATION_REJECTED)
+    def on_rejected(cursor, payload):
+        """通知申请未通过；双选匹配按块写入时 payload 带 app_ids 与 comment"""
+        app_ids = payload.get('app_ids') or [payload['app_id']]
+        messages, entries = [], []
+        for app in parties(cursor, app_ids):
+            if payload.get('comment'):
+                content = f"你向 {app['teacher_name']} 老师提交的申请未通过：{payload['comment']}"
+            else:
+                content = f"{app['teacher_name']} 老师未通过你的申请，可继续申请下一志愿"
+            if app['student_user_id']:
+                messages.append((app['student_user_id'], '申请结果通知', content))
+            entries.append(entry(payload.get('operator_id'), '拒绝', app['id'],
+                                 f"拒绝学生 {app['student_name']} 的申请"))
+        flush(cursor, messages, entries)
+
+    @queue.register(ADMISSION_APPROVED)
+    def on_approved(cursor, payload):
+        """通知录取审批结果；批量审批时 payload 带 app_ids，合并为一条通知任务和一条日志任务"""
+        app_ids = payload.get('app_ids') or [payload['app_id']]
+        messages, entries = [], []
+        for app in parties(cursor, app_ids):
+            content = f"{app['student_name']} 与 {app['teacher_name']} 老师的录取结果审批{app['approval_status']}"
+            if payload.get('comment'):
+                content += f"：{payload['comment']}"
+            for user_id in (app['student_user_id'], app['teacher_user_id']):
+                if user_id:
+                    messages.append((user_id, '录取审批通知', content))
+            entries.append(entry(payload.get('operator_id'), '审批', app['id'], content))
+        flush(cursor, messages, entries)
+
+    @queue.register(NOTIFY)
+    def on_notify(cursor, payload):
+        """payload 为 {'user_ids', 'title', 'content'} 或 {'messages': [(user_id, title, content), ...]}"""
+        messages = payload.get('messages') or [
+            (user_id, payload['title'], payload['content']) for user_id in payload['user_ids']]
+        cursor.executemany('''
+            INSERT INTO notifications (user_id, title, content)
+            VALUES (%s, %s, %s)
+        ''', [tuple(message) for message in messages])
+
+    @queue.register(OPERATION_LOG)
+    def on_log(cursor, payload):
+        """payload 为单条日志或 {'entries': [日志, ...]}"""
+        entries = payload.get('entries') or [payload]
+        cursor.executemany('''
+            INSERT INTO operation_logs (user_id, table_name, operation_type, record_id, content)
+            VALUES (%s, %s, %s, %s, %s)
+        ''', [(entry['user_id'], entry['table_name'], entry['operation_type'],
+               entry['record_id'], entry['content']) for entry in entries])
@@ -0,0 +1,78 @@
+class Rejection:
+    """申请被拒绝的原因代码"""
+
+    NO_PROFILE = 'no_profile'
+    STUDENT_NOT_APPROVED = 'student_not_approved'
+    TEACHER_UNAVAILABLE = 'teacher_unavailable'
+    TOO_MANY = 'too_many'
+    DUPLICATE = 'duplicate'
+    INVALID_PRIORITY = 'invalid_priority'
+    ALREADY_ACCEPTED = 'already_accepted'
+    PENDING_REVIEW = 'pending_review'
+    FIRST_CHOICE_REQUIRED = 'first_choice_required'
+    OUT_OF_ORDER = 'out_of_order'
+    UNKNOWN = 'unknown'
+
+
+REJECTION_MESSAGES = {
+    Rejection.NO_PROFILE: '请先完善个人信息',
+    Rejection.STUDENT_NOT_APPROVED: '您的考生资格还未通过审核，暂时无法申请导师',
+    Rejection.TEACHER_UNAVAILABLE: '该导师暂不可申请',
+    Rejection.TOO_MANY: '最多只能申请3个志愿',
+    Rejection.DUPLICATE: '您已申请过该导师',
+    Rejection.INVALID_PRIORITY: '无效的志愿顺序',
+    Rejection.ALREADY_ACCEPTED: '您已有志愿被通过，不能继续申请',
+    Rejection.PENDING_REVIEW: '请等待当前志愿审核完成后再提交新申请',
+    Rejection.FIRST_CHOICE_REQUIRED: '请先提交第一志愿申请',
+    Rejection.OUT_OF_ORDER: '请按照志愿顺序依次提交申请',
+    Rejection.UNKNOWN: '申请提交失败'
+}
+
+# 数据库触发器 check_application_priority 的报错信息，仅作兜底
+TRIGGER_MESSAGES = {
+    '必须先提交第一志愿': Rejection.FIRST_CHOICE_REQUIRED,
+    '请等待当前志愿审核完成': Rejection.PENDING_REVIEW,
+    '已有志愿被通过': Rejection.ALREADY_ACCEPTED,
+    '请按顺序提交志愿': Rejection.OUT_OF_ORDER,
+    '最多只能申请三个志愿': Rejection.TOO_MANY
+}
+
+
+def validate_application(eligibility, priority):
+    """按志愿规则校验申请，返回拒绝代码，通过时返回 None
+
+    eligibility 为 EligibilityDAO.check 的结果，规则与触发器一致：
+    先有第一志愿、按顺序提交、当前志愿处理完才能提交下一个、已被录取不能再申请。
+    """
+    if not eligibility:
+        return Rejection.NO_PROFILE
+    if eligibility['student_status'] != '已通过':
+        return Rejection.STUDENT_NOT_APPROVED
+    if not eligibility['teacher_exists'] or eligibility['qual_status'] != '已通过':
+        return Rejection.TEACHER_UNAVAILABLE
+    if eligibility['app_count'] >= 3:
+        return Rejection.TOO_MANY
+    if eligibility['duplicate_app_id']:
+        return Rejection.DUPLICATE
+    if priority is None or not 1 <= priority <= 3:
+        return Rejection.INVALID_PRIORITY
+    if eligibility['accepted_count']:
+        return Rejection.ALREADY_ACCEPTED
+    if eligibility['last_status'] == '待处理':
+        return Rejection.PENDING_REVIEW
+    if priority != eligibility['next_priority']:
+        if eligibility['app_count'] == 0:
+            return Rejection.FIRST_CHOICE_REQUIRED
+        return Rejection.OUT_OF_ORDER
+    return None
+
+
+def rejection_from_error(error):
+    """把触发器报错转换为拒绝代码，无法识别时返回 None"""
+    error_msg = str(error)
+    if 'check_application_priority' not in error_msg:
+        return None
+    for message, code in TRIGGER_MESSAGES.items():
+        if message in error_msg:
+            return code
+    return Rejection.UNKNOWN
@@ -1,5 +1,6 @@
-from flask import flash, redirect, url_for
+from flask import flash, redirect, url_for, session, g
 from functools import wraps
+from cache import profile_cache
 
 class BaseController:
     def __init__(self, dao_factory):
@@ -9,4 +10,38 @@ class BaseController:
         """统一错误处理"""
         flash(error_msg)
         print(f"{error_msg}: {e}")
-        return redirect(url_for(redirect_url)) 
\ No newline at end of file
+        return redirect(url_for(redirect_url))
+    
+    def current_student(self):
+        """当前登录学生的资料，每个请求只解析一次"""
+        return self._current_profile('student', self.dao_factory.student_dao)
+    
+    def current_teacher(self):
+        """当前登录导师的资料，每个请求只解析一次"""
+        return self._current_profile('teacher', self.dao_factory.teacher_dao)
+    
+    def _current_profile(self, role, dao):
+        attr = f'current_{role}'
+        if attr in g:
+            return g.get(attr)
+        
+        key = (role, session['user_id'])
+        profile = profile_cache.get(key)
+        if profile is None:
+            profile = dao.get_by_user_id(session['user_id'])
+            # 资料不存在时不缓存，补全资料后可立即生效
+            if profile:
+                profile_cache.set(key, profile)
+        
+        profile = dict(profile) if profile else None
+        setattr(g, attr, profile)
+        return profile
+    
+    def invalidate_profile(self, role=None, user_id=None):
+        """资料变更后使缓存失效；不指定用户时清空全部"""
+        if role and user_id is not None:
+            profile_cache.invalidate((role, user_id))
+        else:
+            profile_cache.invalidate()
+        g.pop('current_student', None)
+        g.pop('current_teacher', None)
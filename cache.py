@@ -0,0 +1,92 @@
+import threading
+import time
+
+
+class TTLCache:
+    """进程内带过期时间的缓存，线程安全
+
+    get_or_load 在未命中时调用 loader 加载；同一 key 并发未命中时只加载一次。
+    写操作后调用 invalidate 使缓存立即失效。
+    """
+
+    def __init__(self, ttl: float, maxsize: int = None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = {}  # key -> (过期时间, 值)
+        self._lock = threading.Lock()
+        self._loading = {}  # key -> threading.Lock
+        self._version = 0
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._stats['hits'] += 1
+                return entry[1]
+            self._stats['misses'] += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            if self.maxsize and key not in self._data and len(self._data) >= self.maxsize:
+                self._evict()
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def get_or_load(self, key, loader):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._stats['hits'] += 1
+                return entry[1]
+            self._stats['misses'] += 1
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        with load_lock:
+            # 等待期间可能已被其他线程加载
+            with self._lock:
+                entry = self._data.get(key)
+                if entry and entry[0] > time.monotonic():
+                    return entry[1]
+                version = self._version
+            value = loader()
+            with self._lock:
+                # 加载期间发生过失效则不写入旧数据
+                if version == self._version:
+                    if self.maxsize and key not in self._data and len(self._data) >= self.maxsize:
+                        self._evict()
+                    self._data[key] = (time.monotonic() + self.ttl, value)
+                self._loading.pop(key, None)
+            return value
+
+    def _evict(self):
+        """淘汰过期项，仍超限时淘汰最早过期的一项（调用方需持有锁）"""
+        now = time.monotonic()
+        for key in [k for k, (expires, _) in self._data.items() if expires <= now]:
+            del self._data[key]
+        if len(self._data) >= self.maxsize:
+            oldest = min(self._data, key=lambda k: self._data[k][0])
+            del self._data[oldest]
+
+    def invalidate(self, key=None):
+        """使指定 key（默认全部）失效"""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+            self._version += 1
+            self._stats['invalidations'] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._data)
+        return stats
+
+
+# 首页招生目录快照
+catalogue_cache = TTLCache(ttl=300)
+
+# 当前登录学生/导师的资料，按 (角色, user_id) 缓存
+profile_cache = TTLCache(ttl=60, maxsize=10000)
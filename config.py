@@ -13,6 +13,47 @@ class Config:
         'cursorclass': 'DictCursor'
     }
     
+    # 连接池配置
+    DB_POOL = {
+        'minsize': int(os.environ.get('DB_POOL_MIN') or 2),
+        'maxsize': int(os.environ.get('DB_POOL_MAX') or 20),
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT') or 10),
+        'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE') or 300)
+    }
+    
+    # 后台任务队列：工作线程数（0 表示不在本进程处理任务）、最大尝试次数与轮询间隔
+    JOB_QUEUE = {
+        'workers': int(os.environ.get('JOB_WORKERS') or 4),
+        'max_attempts': int(os.environ.get('JOB_MAX_ATTEMPTS') or 5),
+        'poll_interval': float(os.environ.get('JOB_POLL_INTERVAL') or 1.0),
+        'keep_done': float(os.environ.get('JOB_KEEP_DONE') or 7 * 86400)
+    }
+    
+    # 同一请求内同一 SQL 执行达到该次数时记为疑似 N+1
+    N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD') or 5)
+    
+    # 慢查询记录：耗时阈值（毫秒）、环形缓冲区容量、同类语句首次变慢时是否执行 EXPLAIN
+    SLOW_QUERY = {
+        'threshold_ms': float(os.environ.get('SLOW_QUERY_MS') or 200),
+        'capacity': int(os.environ.get('SLOW_QUERY_CAPACITY') or 200),
+        'explain': os.environ.get('SLOW_QUERY_EXPLAIN', '1') != '0'
+    }
+    
+    # 总招生数（导师名额合计上限），未配置时不校验
+    TOTAL_ENROLLMENTS = int(os.environ['TOTAL_ENROLLMENTS']) if os.environ.get('TOTAL_ENROLLMENTS') else None
+    
+    # 成绩权重：复试各科目加权得到复试成绩，初试（折算百分制）与复试加权得到总成绩
+    SCORE_WEIGHTS = {
+        'foreign_language': 0.2,
+        'professional_knowledge': 0.4,
+        'comprehensive_interview': 0.4,
+        'initial': 0.5,
+        'retest': 0.5
+    }
+    
+    # 评审标准缓存的有效期（秒），多进程部署时其他进程在此时间内看到新标准
+    STANDARDS_TTL = float(os.environ.get('STANDARDS_TTL') or 60)
+    
     # 上传文件配置
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
     ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx'}
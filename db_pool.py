@@ -0,0 +1,342 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pymysql
+
+
+class PoolExhaustedError(Exception):
+    """连接池在等待超时后仍无空闲连接"""
+
+
+class ConnectionPool:
+    """线程安全的 pymysql 连接池
+
+    - minsize/maxsize 控制常驻连接数与上限
+    - 借出时做健康检查（ping），失效连接直接丢弃重建
+    - 空闲超过 max_idle 秒且超出 minsize 的连接会被回收
+    - 每个请求（线程）通过 checkout() 绑定一条连接，
+      同一请求内的 transaction_context()/query_one 复用这条连接，
+      请求结束时由 release_current() 归还
+    - bind_lazily() 只标记请求开始，第一次用到连接时才借出，
+      不访问数据库的请求（缓存命中的首页、静态文件）不占用连接
+    """
+
+    def __init__(self, db_config: dict, minsize: int = 2, maxsize: int = 20,
+                 timeout: float = 10, max_idle: float = 300):
+        if minsize > maxsize:
+            raise ValueError('minsize 不能大于 maxsize')
+        self.db_config = db_config
+        self.minsize = minsize
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.max_idle = max_idle
+
+        self._idle = deque()  # (conn, 归还时间)
+        self._size = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._stats = {
+            'created': 0,
+            'borrowed': 0,
+            'returned': 0,
+            'discarded': 0,
+            'evicted': 0,
+            'waits': 0,
+            'exhausted': 0,
+            'peak_in_use': 0
+        }
+
+        for _ in range(minsize):
+            self._idle.append((self._connect(), time.monotonic()))
+
+    def _connect(self):
+        conn = pymysql.connect(**self.db_config)
+        with self._cond:
+            self._size += 1
+            self._stats['created'] += 1
+        return conn
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _healthy(self, conn) -> bool:
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _evict_idle(self):
+        """回收空闲过久的连接（调用方需持有锁）"""
+        now = time.monotonic()
+        evicted = []
+        while self._size > self.minsize and self._idle:
+            conn, since = self._idle[0]
+            if now - since < self.max_idle:
+                break
+            self._idle.popleft()
+            self._size -= 1
+            self._stats['evicted'] += 1
+            evicted.append(conn)
+        return evicted
+
+    def acquire(self, timeout: float = None):
+        """借出一条连接，池满时最多等待 timeout 秒"""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            conn = None
+            with self._cond:
+                evicted = self._evict_idle()
+                while not self._idle and self._size >= self.maxsize:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['exhausted'] += 1
+                        raise PoolExhaustedError(
+                            f'数据库连接池已耗尽（maxsize={self.maxsize}）')
+                    self._stats['waits'] += 1
+                    self._cond.wait(remaining)
+                if self._idle:
+                    conn, _ = self._idle.pop()
+                else:
+                    # 预占一个名额，在锁外建立连接
+                    self._size += 1
+            for stale in evicted:
+                self._close(stale)
+
+            if conn is None:
+                try:
+                    conn = pymysql.connect(**self.db_config)
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats['created'] += 1
+            elif not self._healthy(conn):
+                self._close(conn)
+                with self._cond:
+                    self._size -= 1
+                    self._stats['discarded'] += 1
+                    self._cond.notify()
+                continue
+
+            with self._cond:
+                self._stats['borrowed'] += 1
+                in_use = self._size - len(self._idle)
+                self._stats['peak_in_use'] = max(self._stats['peak_in_use'], in_use)
+            return conn
+
+    def release(self, conn, discard: bool = False):
+        """归还连接；discard=True 时直接关闭（如连接已出错）"""
+        if not discard:
+            try:
+                # 防止未提交的事务残留到下一个借用者
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            if discard:
+                self._size -= 1
+                self._stats['discarded'] += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+                self._stats['returned'] += 1
+            self._cond.notify()
+        if discard:
+            self._close(conn)
+
+    def checkout(self):
+        """为当前请求绑定一条连接，重复调用返回同一条"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self.acquire()
+            self._local.conn = conn
+            self._local.tx_depth = 0
+        return conn
+
+    def bind_lazily(self):
+        """请求开始时调用：首次使用连接时才借出，并绑定到请求结束"""
+        self._local.lazy = True
+
+    def current(self):
+        """当前线程绑定的连接；已调用 bind_lazily() 而尚未借出时借出并绑定，否则返回 None"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None and getattr(self._local, 'lazy', False):
+            conn = self.checkout()
+        return conn
+
+    def release_current(self, discard: bool = False):
+        """归还当前请求绑定的连接（在请求结束时调用）"""
+        self._local.lazy = False
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.conn = None
+            self._local.tx_depth = 0
+            self.release(conn, discard=discard)
+
+    @contextmanager
+    def connection(self):
+        """获取连接：优先复用当前请求绑定的连接，否则临时借出"""
+        conn = self.current()
+        if conn is not None:
+            yield conn
+            return
+
+        conn = self.acquire()
+        self._local.conn = conn
+        self._local.tx_depth = 0
+        broken = False
+        try:
+            yield conn
+        except pymysql.err.OperationalError:
+            broken = True
+            raise
+        finally:
+            self._local.conn = None
+            self.release(conn, discard=broken)
+
+    @contextmanager
+    def transaction_context(self):
+        """事务上下文，嵌套调用时由最外层负责开始、提交或回滚
+
+        最外层显式 BEGIN：请求内此前的读取（autocommit 关闭时）打开的一致性视图随之结束，
+        事务内的读取看到的是开始时的最新数据。
+        """
+        with self.connection() as conn:
+            depth = self._local.tx_depth
+            if depth == 0:
+                conn.begin()
+            self._local.tx_depth = depth + 1
+            cursor = conn.cursor()
+            try:
+                yield cursor
+                if depth == 0:
+                    conn.commit()
+            except Exception:
+                if depth == 0:
+                    conn.rollback()
+                raise
+            finally:
+                cursor.close()
+                self._local.tx_depth = depth
+
+    def query_one(self, sql: str, params=None):
+        with self.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                return cursor.fetchone()
+
+    def query_all(self, sql: str, params=None):
+        with self.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                return cursor.fetchall()
+
+    def stats(self) -> dict:
+        """连接池状态与耗尽指标"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'minsize': self.minsize,
+                'maxsize': self.maxsize
+            })
+        return stats
+
+    def close(self):
+        """关闭所有空闲连接"""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+        for conn, _ in idle:
+            self._close(conn)
+
+
+class PooledConnection:
+    """代替 DAO 原先共享的单个连接对象，每次访问都转发到当前线程从池中借出的连接
+
+    请求内为 bind_lazily() 绑定的连接；请求外（命令行等）借出后绑定到当前线程。
+    """
+
+    def __init__(self, pool: ConnectionPool):
+        self._pool = pool
+
+    def _conn(self):
+        return self._pool.current() or self._pool.checkout()
+
+    def __getattr__(self, name):
+        return getattr(self._conn(), name)
+
+    def close(self):
+        """连接由池管理，DAO 关闭连接时不做处理"""
+
+
+def use_pool(dao_factory, pool: ConnectionPool):
+    """让 DAOFactory 创建的各个 DAO 改为从连接池取连接
+
+    - DAO 上的 transaction_context/query_one/query_all 替换为连接池的同名方法
+    - DAO（及 DAOFactory 本身）持有的 pymysql 连接替换为 PooledConnection 并关闭原连接，
+      这样直接使用 self.connection.cursor() 的 DAO 方法也不再跨线程共享同一个连接
+    """
+    proxy = PooledConnection(pool)
+    replaced = []
+
+    def rebind(obj):
+        for name, value in list(vars(obj).items()):
+            if isinstance(value, pymysql.connections.Connection):
+                setattr(obj, name, proxy)
+                replaced.append(value)
+
+    rebind(dao_factory)
+    for name, dao in list(vars(dao_factory).items()):
+        if not name.endswith('_dao'):
+            continue
+        rebind(dao)
+        for method in ('transaction_context', 'query_one', 'query_all'):
+            if hasattr(dao, method):
+                setattr(dao, method, getattr(pool, method))
+
+    for conn in {id(conn): conn for conn in replaced}.values():
+        try:
+            conn.close()
+        except Exception:
+            pass
+    return dao_factory
+
+
+def bulk_update(cursor, table: str, key: str, columns: list, rows: list,
+                extra_set: str = None, chunk_size: int = 1000) -> int:
+    """按主键批量更新多行，每块一条 UPDATE ... JOIN (SELECT ... UNION ALL ...) 语句
+
+    rows 为 [(key 值, columns 各列的值...), ...]；extra_set 为附加的 SET 子句
+    （如 "t.review_time = CURRENT_TIMESTAMP"）。返回受影响行数。
+    与 INSERT ... ON DUPLICATE KEY UPDATE 不同，不会因缺少非空列而失败，也不会插入新行。
+    """
+    names = [key] + list(columns)
+    first = 'SELECT ' + ', '.join(f'%s AS {name}' for name in names)
+    other = 'SELECT ' + ', '.join(['%s'] * len(names))
+    assignments = ', '.join(f't.{column} = v.{column}' for column in columns)
+    if extra_set:
+        assignments += ', ' + extra_set
+
+    affected = 0
+    for i in range(0, len(rows), chunk_size):
+        chunk = rows[i:i + chunk_size]
+        derived = ' UNION ALL '.join([first] + [other] * (len(chunk) - 1))
+        params = [value for row in chunk for value in row]
+        affected += cursor.execute(
+            f'UPDATE {table} t JOIN ({derived}) v ON t.{key} = v.{key} SET {assignments}',
+            params)
+    return affected
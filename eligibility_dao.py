@@ -0,0 +1,72 @@
+def next_priority(last_application) -> int:
+    """根据最近一次申请计算下一个可申请的志愿顺序，0 表示不能申请"""
+    if not last_application:
+        return 1  # 第一次申请
+
+    if last_application['status'] == '未通过':
+        priority = last_application['priority'] + 1
+        return priority if priority <= 3 else 0
+
+    return 0  # 待处理或已通过时不能申请
+
+
+class EligibilityDAO:
+    """学生申请导师的前置检查与提交"""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def check(self, cursor, user_id: int, teacher_id: int):
+        """一次查询取回申请所需的全部前置信息
+
+        返回 None 表示学生信息不存在，否则返回：
+        {'student_id', 'student_status', 'teacher_exists', 'qual_status',
+         'app_count', 'accepted_count', 'duplicate_app_id', 'last_priority',
+         'last_status', 'next_priority'}
+        """
+        cursor.execute('''
+            SELECT s.id AS student_id,
+                   s.status AS student_status,
+                   t.id IS NOT NULL AS teacher_exists,
+                   t.qual_status,
+                   (SELECT COUNT(*) FROM student_applications a
+                    WHERE a.student_id = s.id) AS app_count,
+                   (SELECT COUNT(*) FROM student_applications a
+                    WHERE a.student_id = s.id AND a.status = '已通过') AS accepted_count,
+                   (SELECT a.id FROM student_applications a
+                    WHERE a.student_id = s.id AND a.teacher_id = %s
+                    LIMIT 1) AS duplicate_app_id,
+                   last_app.priority AS last_priority,
+                   last_app.status AS last_status
+            FROM students s
+            LEFT JOIN teachers t ON t.id = %s
+            LEFT JOIN student_applications last_app ON last_app.id = (
+                SELECT a.id FROM student_applications a
+                WHERE a.student_id = s.id
+                ORDER BY a.create_time DESC, a.id DESC
+                LIMIT 1
+            )
+            WHERE s.user_id = %s
+        ''', (teacher_id, teacher_id, user_id))
+        row = cursor.fetchone()
+        if not row:
+            return None
+
+        last_application = None
+        if row['last_status'] is not None:
+            last_application = {'priority': row['last_priority'], 'status': row['last_status']}
+        row['next_priority'] = next_priority(last_application)
+        return row
+
+    def create_application(self, cursor, student_id: int, teacher_id: int, priority: int,
+                           personal_statement: str = '', research_interest: str = '',
+                           apply_reason: str = '') -> int:
+        """在调用方的事务中插入申请，返回申请ID"""
+        cursor.execute('''
+            INSERT INTO student_applications
+                (student_id, teacher_id, priority, personal_statement,
+                 research_interest, apply_reason)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        ''', (student_id, teacher_id, priority, personal_statement,
+              research_interest, apply_reason))
+        return cursor.lastrowid
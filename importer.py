@@ -0,0 +1,223 @@
+import csv
+import io
+import math
+import os
+
+try:
+    import openpyxl
+except ImportError:  # 仅导入 xlsx 时需要
+    openpyxl = None
+
+
+# 成绩满分：初试按 500 分制，复试总成绩按 100 分制（与成绩导入一致）
+INITIAL_FULL_MARK = 500
+RETEST_FULL_MARK = 100
+
+# 学生审核状态
+STUDENT_STATUSES = ('待审核', '已通过', '未通过')
+
+# 表头别名，支持中文表头
+HEADER_ALIASES = {
+    '用户名': 'username',
+    '密码': 'password',
+    '姓名': 'name',
+    '初试成绩': 'initial_score',
+    '复试成绩': 'retest_score',
+    '状态': 'status',
+    '电话': 'phone',
+    '邮箱': 'email',
+    '职称': 'title',
+    '研究方向': 'research_direction',
+    '简介': 'introduction',
+    '招生名额': 'max_students'
+}
+
+
+class RowError(Exception):
+    """单行数据校验失败"""
+
+
+def iter_rows(file_storage):
+    """按行读取上传的 CSV/XLSX 文件，返回 (行号, {列名: 值}) 的生成器"""
+    ext = os.path.splitext(file_storage.filename or '')[1].lower()
+    if ext == '.xlsx':
+        yield from _iter_xlsx(file_storage.stream)
+    elif ext == '.csv':
+        yield from _iter_csv(file_storage.stream)
+    else:
+        raise ValueError('仅支持 CSV 或 XLSX 文件')
+
+
+def _normalize_header(header):
+    header = [str(h or '').strip() for h in header]
+    return [HEADER_ALIASES.get(h, h) for h in header]
+
+
+def _iter_csv(stream):
+    reader = csv.reader(io.TextIOWrapper(stream, encoding='utf-8-sig'))
+    header = _normalize_header(next(reader, []))
+    for line_no, values in enumerate(reader, start=2):
+        if not any(v.strip() for v in values):
+            continue
+        yield line_no, dict(zip(header, (v.strip() for v in values)))
+
+
+def _iter_xlsx(stream):
+    if openpyxl is None:
+        raise ValueError('导入 XLSX 需要安装 openpyxl')
+    workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = _normalize_header(next(rows, []))
+        for line_no, values in enumerate(rows, start=2):
+            values = ['' if v is None else str(v).strip() for v in values]
+            if not any(values):
+                continue
+            yield line_no, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def _required(row, field):
+    value = row.get(field, '')
+    if not value:
+        raise RowError(f'缺少{field}')
+    return value
+
+
+def _choice(row, field, choices, default):
+    value = row.get(field) or default
+    if value not in choices:
+        raise RowError(f"{field} 须为 {'、'.join(choices)} 之一")
+    return value
+
+
+def parse_number(row, field, cast, default, minimum=None, maximum=None):
+    value = row.get(field, '')
+    if value == '':
+        return default
+    try:
+        number = float(value)
+    except ValueError:
+        raise RowError(f'{field} 不是有效数字')
+    if not math.isfinite(number):
+        raise RowError(f'{field} 不是有效数字')
+    value = cast(number)
+    if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+        raise RowError(f'{field} 超出范围')
+    return value
+
+
+class BulkImporter:
+    """学生/导师账号批量导入
+
+    按块处理：每块一次 IN 查询检查用户名，一个事务内用 executemany
+    插入用户与资料。单行校验失败或整块写入失败都记录到错误报告，不影响其他块。
+    """
+
+    CHUNK_SIZE = 500
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def parse_student(self, row):
+        return {
+            'username': _required(row, 'username'),
+            'password': _required(row, 'password'),
+            'name': _required(row, 'name'),
+            'initial_score': parse_number(row, 'initial_score', float, 0, 0, INITIAL_FULL_MARK),
+            'retest_score': parse_number(row, 'retest_score', float, 0, 0, RETEST_FULL_MARK),
+            'status': _choice(row, 'status', STUDENT_STATUSES, '待审核'),
+            'phone': row.get('phone', ''),
+            'email': row.get('email', '')
+        }
+
+    def parse_teacher(self, row):
+        return {
+            'username': _required(row, 'username'),
+            'password': _required(row, 'password'),
+            'name': _required(row, 'name'),
+            'title': row.get('title', ''),
+            'research_direction': row.get('research_direction', ''),
+            'introduction': row.get('introduction', ''),
+            'max_students': parse_number(row, 'max_students', int, 0, 0, 100)
+        }
+
+    def run(self, role, rows) -> dict:
+        """导入 rows（(行号, 行数据) 迭代器），返回导入数量与逐行错误"""
+        parse = self.parse_student if role == 'student' else self.parse_teacher
+        result = {'imported': 0, 'failed': 0, 'errors': []}
+        seen = set()
+        chunk = []
+
+        def fail(line_no, username, error):
+            result['failed'] += 1
+            result['errors'].append({'row': line_no, 'username': username, 'error': error})
+
+        for line_no, row in rows:
+            try:
+                record = parse(row)
+            except RowError as e:
+                fail(line_no, row.get('username', ''), str(e))
+                continue
+            if record['username'] in seen:
+                fail(line_no, record['username'], '文件中用户名重复')
+                continue
+            seen.add(record['username'])
+            chunk.append((line_no, record))
+            if len(chunk) >= self.CHUNK_SIZE:
+                self._import_chunk(role, chunk, result, fail)
+                chunk = []
+
+        if chunk:
+            self._import_chunk(role, chunk, result, fail)
+        return result
+
+    def _import_chunk(self, role, chunk, result, fail):
+        usernames = [record['username'] for _, record in chunk]
+        placeholders = ', '.join(['%s'] * len(usernames))
+        existing = {row['username'] for row in self.pool.query_all(
+            f'SELECT username FROM users WHERE username IN ({placeholders})', usernames)}
+
+        records = []
+        for line_no, record in chunk:
+            if record['username'] in existing:
+                fail(line_no, record['username'], '用户名已存在')
+            else:
+                records.append((line_no, record))
+        if not records:
+            return
+
+        try:
+            with self.pool.transaction_context() as cursor:
+                cursor.executemany(
+                    'INSERT INTO users (username, password, role) VALUES (%s, %s, %s)',
+                    [(r['username'], r['password'], role) for _, r in records])
+
+                names = [r['username'] for _, r in records]
+                cursor.execute(
+                    f"SELECT id, username FROM users WHERE username IN ({', '.join(['%s'] * len(names))})",
+                    names)
+                user_ids = {row['username']: row['id'] for row in cursor.fetchall()}
+
+                if role == 'student':
+                    cursor.executemany('''
+                        INSERT INTO students
+                            (user_id, name, status, initial_score, retest_score, phone, email)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    ''', [(user_ids[r['username']], r['name'], r['status'], r['initial_score'],
+                           r['retest_score'], r['phone'], r['email']) for _, r in records])
+                else:
+                    cursor.executemany('''
+                        INSERT INTO teachers
+                            (user_id, name, title, research_direction, introduction, max_students)
+                        VALUES (%s, %s, %s, %s, %s, %s)
+                    ''', [(user_ids[r['username']], r['name'], r['title'], r['research_direction'],
+                           r['introduction'], r['max_students']) for _, r in records])
+        except Exception as e:
+            print(f"批量导入写入失败: {e}")
+            for line_no, record in records:
+                fail(line_no, record['username'], f'写入失败：{e}')
+            return
+
+        result['imported'] += len(records)
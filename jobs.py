@@ -0,0 +1,309 @@
+import json
+import threading
+import time
+
+
+class JobQueue:
+    """进程内后台任务队列，任务持久化在 background_jobs 表中
+
+    - enqueue() 可传入调用方的 cursor，使任务与业务 UPDATE 在同一事务中提交
+    - 工作线程用 SELECT ... FOR UPDATE SKIP LOCKED（MySQL 8.0+）领取任务，
+      多个进程可以共用同一张表
+    - 处理函数 handler(cursor, payload) 与“标记完成”在同一事务中执行，
+      数据库副作用不会因重试而重复
+    - 失败后按指数退避重试，超过 max_attempts 次进入死信（dead）状态
+    - 建表与恢复由工作线程完成，数据库暂时不可用时按轮询间隔重试
+    - 工作线程每 stale_after 秒恢复一次超时任务，并删除完成超过 keep_done 秒的任务
+    """
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    DEAD = 'dead'
+
+    TABLE_SQL = '''
+        CREATE TABLE IF NOT EXISTS background_jobs (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            job_type VARCHAR(64) NOT NULL,
+            payload JSON NOT NULL,
+            status VARCHAR(16) NOT NULL DEFAULT 'pending',
+            attempts INT NOT NULL DEFAULT 0,
+            last_error TEXT,
+            run_after DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            create_time DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            update_time DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_jobs_status_run_after (status, run_after)
+        ) DEFAULT CHARSET=utf8mb4
+    '''
+
+    def __init__(self, pool, workers: int = 4, max_attempts: int = 5,
+                 backoff: float = 2.0, max_backoff: float = 300,
+                 poll_interval: float = 1.0, stale_after: float = 300,
+                 keep_done: float = 7 * 86400):
+        self.pool = pool
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.keep_done = keep_done
+
+        self._handlers = {}
+        self._threads = []
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._setup = None
+        self._setup_lock = threading.Lock()
+        self._ready = False
+        self._next_maintenance = 0.0
+        self._stats = {
+            'enqueued': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'retried': 0,
+            'dead_lettered': 0,
+            'recovered': 0,
+            'purged': 0
+        }
+
+    def register(self, job_type: str, handler=None):
+        """注册任务处理函数，可作为装饰器使用"""
+        if handler is None:
+            def decorator(func):
+                self._handlers[job_type] = func
+                return func
+            return decorator
+        self._handlers[job_type] = handler
+        return handler
+
+    def ensure_table(self):
+        with self.pool.transaction_context() as cursor:
+            cursor.execute(self.TABLE_SQL)
+
+    def enqueue(self, job_type: str, payload: dict, cursor=None, delay: float = 0) -> int:
+        """写入一条任务，返回任务 id
+
+        传入 cursor 时随调用方的事务一起提交；否则单独提交。
+        """
+        if job_type not in self._handlers:
+            raise ValueError(f'未注册的任务类型: {job_type}')
+        params = (job_type, json.dumps(payload, ensure_ascii=False, default=str), delay)
+        sql = '''
+            INSERT INTO background_jobs (job_type, payload, run_after)
+            VALUES (%s, %s, DATE_ADD(CURRENT_TIMESTAMP, INTERVAL %s SECOND))
+        '''
+        if cursor is not None:
+            cursor.execute(sql, params)
+            job_id = cursor.lastrowid
+        else:
+            with self.pool.transaction_context() as cursor:
+                cursor.execute(sql, params)
+                job_id = cursor.lastrowid
+        self._record('enqueued')
+        self.wake()
+        return job_id
+
+    def wake(self):
+        """唤醒空闲的工作线程（调用方事务提交后调用，可省去轮询等待）"""
+        self._wake.set()
+
+    def start(self, setup=None):
+        """启动工作线程
+
+        setup(queue)（如建表）在工作线程领取任务前执行，
+        失败时记录错误并在下个轮询间隔重试，不影响应用启动。
+        """
+        if self._threads or self.workers <= 0:
+            return
+        self._setup = setup
+        self._ready = False
+        self._next_maintenance = 0.0
+        self._stopping.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'job-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10):
+        self._stopping.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def recover(self) -> int:
+        """把 running 状态超过 stale_after 秒的任务（进程异常退出遗留）放回队列"""
+        with self.pool.transaction_context() as cursor:
+            recovered = cursor.execute('''
+                UPDATE background_jobs
+                SET status = %s
+                WHERE status = %s
+                AND update_time < DATE_SUB(CURRENT_TIMESTAMP, INTERVAL %s SECOND)
+            ''', (self.PENDING, self.RUNNING, self.stale_after))
+        self._record('recovered', recovered)
+        return recovered
+
+    def _prepare(self) -> bool:
+        with self._setup_lock:
+            if self._ready:
+                return True
+            try:
+                if self._setup is not None:
+                    self._setup(self)
+            except Exception as e:
+                print(f"后台任务队列初始化失败，稍后重试: {e}")
+                return False
+            self._ready = True
+            return True
+
+    def _work(self):
+        while not self._stopping.is_set():
+            if not self._prepare():
+                self._stopping.wait(self.poll_interval)
+                continue
+            self._maintain()
+            try:
+                job = self._claim()
+            except Exception as e:
+                print(f"领取后台任务错误: {e}")
+                job = None
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            self._run(job)
+
+    def _maintain(self):
+        """每 stale_after 秒由一个工作线程执行一次 recover() 与 purge()"""
+        now = time.monotonic()
+        with self._setup_lock:
+            if now < self._next_maintenance:
+                return
+            self._next_maintenance = now + self.stale_after
+        try:
+            self.recover()
+            self.purge()
+        except Exception as e:
+            print(f"后台任务队列维护错误: {e}")
+
+    def purge(self, batch_size: int = 1000) -> int:
+        """分批删除完成超过 keep_done 秒的任务，返回删除行数"""
+        purged = 0
+        while True:
+            with self.pool.transaction_context() as cursor:
+                deleted = cursor.execute('''
+                    DELETE FROM background_jobs
+                    WHERE status = %s
+                    AND update_time < DATE_SUB(CURRENT_TIMESTAMP, INTERVAL %s SECOND)
+                    LIMIT %s
+                ''', (self.DONE, self.keep_done, batch_size))
+            purged += deleted
+            if deleted < batch_size:
+                break
+        self._record('purged', purged)
+        return purged
+
+    def _claim(self):
+        with self.pool.transaction_context() as cursor:
+            cursor.execute('''
+                SELECT id, job_type, payload, attempts
+                FROM background_jobs
+                WHERE status = %s AND run_after <= CURRENT_TIMESTAMP
+                ORDER BY id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            ''', (self.PENDING,))
+            job = cursor.fetchone()
+            if job:
+                cursor.execute('''
+                    UPDATE background_jobs
+                    SET status = %s, attempts = attempts + 1
+                    WHERE id = %s
+                ''', (self.RUNNING, job['id']))
+                job['attempts'] += 1
+        return job
+
+    def _run(self, job):
+        handler = self._handlers.get(job['job_type'])
+        try:
+            if handler is None:
+                raise LookupError(f"未注册的任务类型: {job['job_type']}")
+            with self.pool.transaction_context() as cursor:
+                handler(cursor, json.loads(job['payload']))
+                cursor.execute('UPDATE background_jobs SET status = %s, last_error = NULL WHERE id = %s',
+                               (self.DONE, job['id']))
+            self._record('succeeded')
+        except Exception as e:
+            self._fail(job, e, retry=handler is not None)
+
+    def _fail(self, job, error, retry: bool = True):
+        self._record('failed')
+        dead = not retry or job['attempts'] >= self.max_attempts
+        delay = min(self.backoff ** job['attempts'], self.max_backoff)
+        try:
+            with self.pool.transaction_context() as cursor:
+                cursor.execute('''
+                    UPDATE background_jobs
+                    SET status = %s, last_error = %s,
+                        run_after = DATE_ADD(CURRENT_TIMESTAMP, INTERVAL %s SECOND)
+                    WHERE id = %s
+                ''', (self.DEAD if dead else self.PENDING, repr(error), delay, job['id']))
+        except Exception as e:
+            # 状态写入失败时任务停留在 running，由 recover() 放回队列
+            print(f"更新后台任务状态错误: {e}")
+        self._record('dead_lettered' if dead else 'retried')
+        if dead:
+            print(f"后台任务 {job['id']}（{job['job_type']}）进入死信: {error!r}")
+
+    def retry(self, job_id: int) -> bool:
+        """把死信任务重新放回队列"""
+        with self.pool.transaction_context() as cursor:
+            updated = cursor.execute('''
+                UPDATE background_jobs
+                SET status = %s, attempts = 0, run_after = CURRENT_TIMESTAMP
+                WHERE id = %s AND status = %s
+            ''', (self.PENDING, job_id, self.DEAD))
+        if updated:
+            self.wake()
+        return bool(updated)
+
+    def dead_letters(self, limit: int = 50):
+        return self.pool.query_all('''
+            SELECT id, job_type, payload, attempts, last_error, create_time, update_time
+            FROM background_jobs
+            WHERE status = %s
+            ORDER BY id DESC
+            LIMIT %s
+        ''', (self.DEAD, limit))
+
+    def _record(self, key, count: int = 1):
+        with self._lock:
+            self._stats[key] += count
+
+    def stats(self) -> dict:
+        """队列深度（按状态计数）、最早待处理任务的等待秒数与本进程的处理计数"""
+        rows = self.pool.query_all('''
+            SELECT status, COUNT(*) AS count,
+                   TIMESTAMPDIFF(SECOND, MIN(create_time), CURRENT_TIMESTAMP) AS oldest_age
+            FROM background_jobs
+            WHERE status <> %s
+            GROUP BY status
+        ''', (self.DONE,))
+        depth = {self.PENDING: 0, self.RUNNING: 0, self.DEAD: 0}
+        oldest_pending = 0
+        for row in rows:
+            depth[row['status']] = row['count']
+            if row['status'] == self.PENDING:
+                oldest_pending = row['oldest_age'] or 0
+
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update({
+            'depth': depth,
+            'oldest_pending_seconds': oldest_pending,
+            'workers': len(self._threads),
+            'handlers': sorted(self._handlers)
+        })
+        return stats
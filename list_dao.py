@@ -0,0 +1,115 @@
+from pagination import keyset_page, estimate_table_rows, capped_count, DEFAULT_LIMIT
+
+
+class ListDAO:
+    """管理端列表的游标分页查询，统一按主键倒序（最新在前）"""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def _page(self, select_sql, from_sql, key, table, conditions=None, params=None,
+              after=None, limit=DEFAULT_LIMIT):
+        page = keyset_page(self.pool, select_sql + from_sql, key,
+                           conditions, params, after, limit)
+        if conditions:
+            count = capped_count(self.pool, from_sql, conditions, params)
+            page['total'] = count['total']
+            page['total_exact'] = count['exact']
+        else:
+            page['total'] = estimate_table_rows(self.pool, table)
+            page['total_exact'] = False
+        return page
+
+    def get_users_page(self, after=None, limit=DEFAULT_LIMIT):
+        return self._page(
+            # 不取 password，避免密码哈希随列表传给模板
+            '''
+            SELECT u.id, u.username, u.role, u.create_time,
+                   COALESCE(s.name, t.name) AS real_name
+            ''',
+            '''
+            FROM users u
+            LEFT JOIN students s ON s.user_id = u.id
+            LEFT JOIN teachers t ON t.user_id = u.id
+            ''',
+            'u.id', 'users', after=after, limit=limit)
+
+    def get_students_page(self, after=None, limit=DEFAULT_LIMIT):
+        return self._page(
+            '''
+            SELECT s.*, u.username,
+                   (SELECT COUNT(*) FROM student_applications sa
+                    WHERE sa.student_id = s.id) AS application_count
+            ''',
+            '''
+            FROM students s
+            JOIN users u ON s.user_id = u.id
+            ''',
+            's.id', 'students', after=after, limit=limit)
+
+    def get_teachers_page(self, after=None, limit=DEFAULT_LIMIT):
+        return self._page(
+            '''
+            SELECT t.*, u.username,
+                   (SELECT COUNT(*) FROM student_applications sa
+                    WHERE sa.teacher_id = t.id AND sa.status = '已通过') AS current_students
+            ''',
+            '''
+            FROM teachers t
+            JOIN users u ON t.user_id = u.id
+            ''',
+            't.id', 'teachers', after=after, limit=limit)
+
+    def get_qualifications_page(self, after=None, limit=DEFAULT_LIMIT):
+        return self._page(
+            'SELECT q.*, t.name AS teacher_name, t.title',
+            '''
+            FROM teacher_qualifications q
+            JOIN teachers t ON q.teacher_id = t.id
+            ''',
+            'q.id', 'teacher_qualifications', after=after, limit=limit)
+
+    def get_admissions_page(self, after=None, limit=DEFAULT_LIMIT):
+        return self._page(
+            '''
+            SELECT sa.*, s.name AS student_name, s.initial_score, s.retest_score,
+                   t.name AS teacher_name
+            ''',
+            '''
+            FROM student_applications sa
+            JOIN students s ON sa.student_id = s.id
+            JOIN teachers t ON sa.teacher_id = t.id
+            ''',
+            'sa.id', 'student_applications',
+            ["sa.status = '已通过'"], after=after, limit=limit)
+
+    def qualifications_for_teachers(self, teacher_ids) -> list:
+        """当前页导师的资格申请（字段与 get_qualifications_page 相同），新的在前"""
+        if not teacher_ids:
+            return []
+
+        placeholders = ', '.join(['%s'] * len(teacher_ids))
+        return list(self.pool.query_all(f'''
+            SELECT q.*, t.name AS teacher_name, t.title
+            FROM teacher_qualifications q
+            JOIN teachers t ON q.teacher_id = t.id
+            WHERE q.teacher_id IN ({placeholders})
+            ORDER BY q.id DESC
+        ''', list(teacher_ids)))
+
+    def teacher_major_map(self, teacher_ids) -> dict:
+        """批量获取导师的专业ID列表，返回 {teacher_id: [major_id, ...]}"""
+        if not teacher_ids:
+            return {}
+
+        placeholders = ', '.join(['%s'] * len(teacher_ids))
+        rows = self.pool.query_all(f'''
+            SELECT teacher_id, GROUP_CONCAT(major_id ORDER BY major_id) AS major_ids
+            FROM teacher_majors
+            WHERE teacher_id IN ({placeholders})
+            GROUP BY teacher_id
+        ''', list(teacher_ids))
+        return {
+            row['teacher_id']: [int(major_id) for major_id in row['major_ids'].split(',')]
+            for row in rows if row['major_ids']
+        }
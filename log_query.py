@@ -0,0 +1,165 @@
+import csv
+import io
+import json
+
+from pymysql.cursors import SSDictCursor
+
+from pagination import keyset_page, estimate_table_rows, capped_count, DEFAULT_LIMIT
+
+
+class LogQuery:
+    """操作日志查询：按筛选条件建立的复合索引、游标分页与流式导出
+
+    列表按 id 倒序，每个筛选组合都有以 id 结尾的索引：
+    (table_name, operation_type)（InnoDB 二级索引隐含主键列）、(table_name, id)、
+    (operation_type, id)，等值筛选后可以直接按 id 倒序扫描，不需要额外排序。
+    日期范围按 create_time 筛选，并通过 (create_time, id) 索引求出范围内的 id 上下界，
+    与等值条件一起沿 id 扫描时只需访问该 id 区间。
+    """
+
+    SELECT_SQL = 'SELECT l.*, u.username AS operator_name'
+    FROM_SQL = '''
+        FROM operation_logs l
+        LEFT JOIN users u ON l.user_id = u.id
+    '''
+
+    # 与 get_logs 的筛选条件对应的索引
+    INDEXES = {
+        'idx_logs_table_type': '(table_name, operation_type)',
+        'idx_logs_table_id': '(table_name, id)',
+        'idx_logs_type_id': '(operation_type, id)',
+        'idx_logs_time_id': '(create_time, id)'
+    }
+
+    # 被上面的索引取代、ensure_indexes 时删除
+    OBSOLETE_INDEXES = ('idx_logs_type', 'idx_logs_create_time')
+
+    EXPORT_BATCH_SIZE = 1000
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def ensure_indexes(self) -> list:
+        """创建缺失的日志索引，返回新建的索引名"""
+        rows = self.pool.query_all('''
+            SELECT DISTINCT INDEX_NAME
+            FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'operation_logs'
+        ''')
+        existing = {row['INDEX_NAME'] for row in rows}
+
+        created = []
+        with self.pool.transaction_context() as cursor:
+            for name, columns in self.INDEXES.items():
+                if name not in existing:
+                    cursor.execute(f'CREATE INDEX {name} ON operation_logs {columns}')
+                    created.append(name)
+            for name in self.OBSOLETE_INDEXES:
+                if name in existing:
+                    cursor.execute(f'DROP INDEX {name} ON operation_logs')
+        return created
+
+    def build_filters(self, table_name=None, operation_type=None, start_date=None, end_date=None):
+        """筛选条件
+
+        日期范围始终按 create_time 筛选；另用 (create_time, id) 索引求出范围内的
+        最小、最大 id，作为附加的 id 范围缩小扫描（不依赖 id 与写入时间同序）。
+        没有符合的日志时加入恒假条件。
+        """
+        conditions, params = [], []
+        if table_name:
+            conditions.append('l.table_name = %s')
+            params.append(table_name)
+        if operation_type:
+            conditions.append('l.operation_type = %s')
+            params.append(operation_type)
+
+        time_conditions, time_params = [], []
+        if start_date:
+            time_conditions.append('create_time >= %s')
+            time_params.append(start_date)
+        if end_date:
+            time_conditions.append('create_time < DATE_ADD(%s, INTERVAL 1 DAY)')
+            time_params.append(end_date)
+        if time_conditions:
+            conditions.extend('l.' + condition for condition in time_conditions)
+            params.extend(time_params)
+            bounds = self.pool.query_one(f'''
+                SELECT MIN(id) AS first_id, MAX(id) AS last_id
+                FROM operation_logs
+                WHERE {' AND '.join(time_conditions)}
+            ''', time_params)
+            if bounds['first_id'] is None:
+                conditions.append('1 = 0')
+            else:
+                conditions.append('l.id BETWEEN %s AND %s')
+                params.extend([bounds['first_id'], bounds['last_id']])
+        return conditions, params
+
+    def page(self, table_name=None, operation_type=None, start_date=None,
+             end_date=None, after=None, limit=DEFAULT_LIMIT) -> dict:
+        """按筛选条件分页查询日志"""
+        conditions, params = self.build_filters(table_name, operation_type, start_date, end_date)
+        page = keyset_page(self.pool, self.SELECT_SQL + self.FROM_SQL, 'l.id',
+                           conditions, params, after, limit)
+        if conditions:
+            count = capped_count(self.pool, self.FROM_SQL, conditions, params)
+            page['total'] = count['total']
+            page['total_exact'] = count['exact']
+        else:
+            page['total'] = estimate_table_rows(self.pool, 'operation_logs')
+            page['total_exact'] = False
+        return page
+
+    def iter_rows(self, table_name=None, operation_type=None, start_date=None, end_date=None):
+        """用服务端游标逐批读取日志，内存占用与结果集大小无关
+
+        单独从连接池借出一条连接，读完或生成器被关闭时归还。
+        """
+        conditions, params = self.build_filters(table_name, operation_type, start_date, end_date)
+        sql = self.SELECT_SQL + self.FROM_SQL
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY l.id'
+
+        conn = self.pool.acquire()
+        broken = False
+        try:
+            cursor = conn.cursor(SSDictCursor)
+            try:
+                cursor.execute(sql, params)
+                while True:
+                    rows = cursor.fetchmany(self.EXPORT_BATCH_SIZE)
+                    if not rows:
+                        break
+                    yield from rows
+            finally:
+                try:
+                    cursor.close()
+                except Exception:
+                    # 提前关闭时未读完的结果集可能使连接失效
+                    broken = True
+        finally:
+            self.pool.release(conn, discard=broken)
+
+    def export_csv(self, **filters):
+        """逐行生成 CSV 文本"""
+        buffer = io.StringIO()
+        writer = None
+        yield '\ufeff'  # BOM，便于 Excel 识别 UTF-8
+        for row in self.iter_rows(**filters):
+            if writer is None:
+                writer = csv.DictWriter(buffer, fieldnames=list(row.keys()))
+                writer.writeheader()
+            writer.writerow(row)
+            if buffer.tell() >= 64 * 1024:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    def export_jsonl(self, **filters):
+        """逐行生成 JSON Lines 文本"""
+        for row in self.iter_rows(**filters):
+            yield json.dumps(row, ensure_ascii=False, default=str) + '\n'
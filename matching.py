@@ -0,0 +1,266 @@
+import heapq
+import time
+from collections import defaultdict, deque
+
+from application_jobs import APPLICATION_ACCEPTED, APPLICATION_REJECTED
+
+
+def deferred_acceptance(applications, capacities: dict) -> dict:
+    """学生提议的延迟接受算法（Gale–Shapley）
+
+    applications: 申请列表，每项需包含 id、student_id、teacher_id、priority、
+                  initial_score、retest_score
+    capacities:   {teacher_id: 剩余名额}
+
+    学生按志愿顺序（priority 升序）依次提议；导师按复试成绩、初试成绩
+    从高到低择优，名额满时淘汰当前暂录中最差的一位。
+    每条申请至多被提议一次，整体复杂度 O(P log Q)。
+    """
+    prefs = defaultdict(list)
+    for app in applications:
+        prefs[app['student_id']].append(app)
+    for student_apps in prefs.values():
+        student_apps.sort(key=lambda a: a['priority'])
+
+    def rank(app):
+        # 越大越优；同分时学生 ID 小者优先，保证结果确定
+        return (app['retest_score'] or 0, app['initial_score'] or 0, -app['student_id'])
+
+    held = defaultdict(list)  # teacher_id -> 小根堆 [(rank, app_id, app)]
+    next_choice = dict.fromkeys(prefs, 0)
+    free = deque(prefs)
+
+    while free:
+        student_id = free.popleft()
+        idx = next_choice[student_id]
+        student_apps = prefs[student_id]
+        if idx >= len(student_apps):
+            continue
+        app = student_apps[idx]
+        next_choice[student_id] = idx + 1
+
+        capacity = capacities.get(app['teacher_id'], 0)
+        heap = held[app['teacher_id']]
+        entry = (rank(app), app['id'], app)
+        if len(heap) < capacity:
+            heapq.heappush(heap, entry)
+        elif heap and entry[0] > heap[0][0]:
+            displaced = heapq.heapreplace(heap, entry)
+            free.append(displaced[2]['student_id'])
+        else:
+            free.append(student_id)
+
+    matches = [entry[2] for heap in held.values() for entry in heap]
+    matched_ids = {app['id'] for app in matches}
+    matched_students = {app['student_id'] for app in matches}
+    rejected = [app for app in applications if app['id'] not in matched_ids]
+    unmatched_students = [sid for sid in prefs if sid not in matched_students]
+
+    matches.sort(key=lambda a: (a['teacher_id'], a['student_id']))
+    return {
+        'matches': matches,
+        'rejected': rejected,
+        'unmatched_students': unmatched_students
+    }
+
+
+class MatchingEngine:
+    """双选批量匹配：一次性加载、内存中匹配、单事务批量写回"""
+
+    CHUNK_SIZE = 1000
+
+    def __init__(self, pool, jobs=None):
+        self.pool = pool
+        self.jobs = jobs
+
+    def load(self):
+        """一次查询加载所有待处理申请（含成绩），一次查询加载剩余名额"""
+        applications = self.pool.query_all('''
+            SELECT sa.id, sa.student_id, sa.teacher_id, sa.priority,
+                   s.name AS student_name, s.initial_score, s.retest_score,
+                   t.name AS teacher_name
+            FROM student_applications sa
+            JOIN students s ON sa.student_id = s.id
+            JOIN teachers t ON sa.teacher_id = t.id
+            WHERE sa.status = '待处理'
+            AND s.status = '已通过'
+            AND t.qual_status = '已通过'
+            AND NOT EXISTS (
+                SELECT 1 FROM student_applications x
+                WHERE x.student_id = sa.student_id
+                AND x.status = '已通过'
+            )
+        ''')
+
+        quota_rows = self.pool.query_all('''
+            SELECT t.id, t.max_students - COUNT(sa.id) AS remaining
+            FROM teachers t
+            LEFT JOIN student_applications sa
+                ON sa.teacher_id = t.id AND sa.status = '已通过'
+            WHERE t.qual_status = '已通过'
+            GROUP BY t.id, t.max_students
+        ''')
+        capacities = {row['id']: max(int(row['remaining'] or 0), 0) for row in quota_rows}
+
+        return list(applications), capacities
+
+    def run(self, dry_run: bool = True, operator_id: int = None) -> dict:
+        """执行一轮匹配；dry_run 时只返回匹配方案，不写数据库"""
+        started = time.perf_counter()
+        applications, capacities = self.load()
+        result = deferred_acceptance(applications, capacities)
+
+        result['stats'] = {
+            'applications': len(applications),
+            'students': len({a['student_id'] for a in applications}),
+            'matched': len(result['matches']),
+            'unmatched_students': len(result['unmatched_students']),
+            'dry_run': dry_run
+        }
+
+        if not dry_run:
+            result['stats'].update(self.commit(result, operator_id))
+
+        result['stats']['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    def commit(self, result: dict, operator_id: int = None) -> dict:
+        """在一个事务中批量写回匹配结果
+
+        加载与写回之间可能有导师单独录取（QuotaReservation.accept），因此写回前：
+        - 锁定相关学生的全部申请行，跳过已不是“待处理”、或学生已被录取的匹配
+        - 锁定相关导师行并重新计算剩余名额，名额不足时按成绩保留靠前的匹配
+        - 锁定待拒绝的申请行，只拒绝仍是“待处理”的申请
+        录取的 UPDATE 另外带 NOT EXISTS 条件，保证每个学生至多一条“已通过”。
+        录取与拒绝每块各写入一条任务（application.accepted / application.rejected），
+        与单独录取、拒绝一样发送通知并记录日志。
+        """
+        with self.pool.transaction_context() as cursor:
+            matches = self._recheck(cursor, result['matches'])
+            matched_ids = [app['id'] for app in matches]
+            rejected_ids = self._pending(cursor, [app['id'] for app in result['rejected']])
+
+            accepted = self._bulk_update(cursor, '''
+                UPDATE student_applications
+                SET status = '已通过',
+                    process_time = CURRENT_TIMESTAMP,
+                    process_comment = '双选匹配录取',
+                    approval_status = '待审批'
+                WHERE status = '待处理' AND id IN ({})
+                AND NOT EXISTS (
+                    SELECT 1 FROM (
+                        SELECT DISTINCT student_id FROM student_applications
+                        WHERE status = '已通过'
+                    ) admitted
+                    WHERE admitted.student_id = student_applications.student_id
+                )
+            ''', matched_ids)
+
+            rejected = self._bulk_update(cursor, '''
+                UPDATE student_applications
+                SET status = '未通过',
+                    process_time = CURRENT_TIMESTAMP,
+                    process_comment = '双选匹配未录取'
+                WHERE status = '待处理' AND id IN ({})
+            ''', rejected_ids)
+
+            if self.jobs is not None:
+                for i in range(0, len(matched_ids), self.CHUNK_SIZE):
+                    self.jobs.enqueue(APPLICATION_ACCEPTED, {
+                        'app_ids': matched_ids[i:i + self.CHUNK_SIZE],
+                        'operator_id': operator_id
+                    }, cursor=cursor)
+                for i in range(0, len(rejected_ids), self.CHUNK_SIZE):
+                    self.jobs.enqueue(APPLICATION_REJECTED, {
+                        'app_ids': rejected_ids[i:i + self.CHUNK_SIZE],
+                        'comment': '双选匹配未录取',
+                        'operator_id': operator_id
+                    }, cursor=cursor)
+
+        if self.jobs is not None and (matched_ids or rejected_ids):
+            self.jobs.wake()
+        return {
+            'accepted': accepted,
+            'rejected': rejected,
+            'skipped': len(result['matches']) + len(result['rejected']) - accepted - rejected
+        }
+
+    def _pending(self, cursor, app_ids: list) -> list:
+        """锁定并返回其中仍是“待处理”的申请 id"""
+        pending = []
+        for i in range(0, len(app_ids), self.CHUNK_SIZE):
+            chunk = app_ids[i:i + self.CHUNK_SIZE]
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f'''
+                SELECT id FROM student_applications
+                WHERE id IN ({placeholders}) AND status = '待处理'
+                ORDER BY id
+                FOR UPDATE
+            ''', chunk)
+            pending.extend(row['id'] for row in cursor.fetchall())
+        return pending
+
+    def _recheck(self, cursor, matches: list) -> list:
+        """在写事务中加锁复核匹配结果，返回仍可录取的匹配"""
+        if not matches:
+            return []
+
+        # 与 QuotaReservation.accept 相同，先锁导师行再锁申请行
+        teacher_ids = sorted({app['teacher_id'] for app in matches})
+        teacher_placeholders = ', '.join(['%s'] * len(teacher_ids))
+        cursor.execute(f'''
+            SELECT id, max_students FROM teachers
+            WHERE id IN ({teacher_placeholders})
+            ORDER BY id
+            FOR UPDATE
+        ''', teacher_ids)
+        remaining = {row['id']: row['max_students'] or 0 for row in cursor.fetchall()}
+
+        student_ids = list({app['student_id'] for app in matches})
+        current, admitted = {}, set()
+        for i in range(0, len(student_ids), self.CHUNK_SIZE):
+            chunk = student_ids[i:i + self.CHUNK_SIZE]
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f'''
+                SELECT id, student_id, status
+                FROM student_applications
+                WHERE student_id IN ({placeholders})
+                FOR UPDATE
+            ''', chunk)
+            for row in cursor.fetchall():
+                current[row['id']] = row['status']
+                if row['status'] == '已通过':
+                    admitted.add(row['student_id'])
+
+        # 锁定读，读取最新提交的录取人数
+        cursor.execute(f'''
+            SELECT teacher_id, COUNT(*) AS accepted_count
+            FROM student_applications
+            WHERE teacher_id IN ({teacher_placeholders}) AND status = '已通过'
+            GROUP BY teacher_id
+            FOR UPDATE
+        ''', teacher_ids)
+        for row in cursor.fetchall():
+            remaining[row['teacher_id']] -= row['accepted_count']
+
+        def rank(app):
+            return (app['retest_score'] or 0, app['initial_score'] or 0, -app['student_id'])
+
+        kept = []
+        for app in sorted(matches, key=rank, reverse=True):
+            if current.get(app['id']) != '待处理' or app['student_id'] in admitted:
+                continue
+            if remaining.get(app['teacher_id'], 0) <= 0:
+                continue
+            remaining[app['teacher_id']] -= 1
+            kept.append(app)
+        kept.sort(key=lambda a: (a['teacher_id'], a['student_id']))
+        return kept
+
+    def _bulk_update(self, cursor, sql: str, ids: list) -> int:
+        affected = 0
+        for i in range(0, len(ids), self.CHUNK_SIZE):
+            chunk = ids[i:i + self.CHUNK_SIZE]
+            placeholders = ', '.join(['%s'] * len(chunk))
+            affected += cursor.execute(sql.format(placeholders), chunk)
+        return affected
@@ -0,0 +1,183 @@
+import threading
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+from pymysql.cursors import DictCursor
+
+from config import Config
+from slow_query import slow_query_log
+
+
+class Histogram:
+    """对数-线性分桶的直方图（HDR 风格）
+
+    小于 2 * sub_buckets 的值逐个计数；更大的值按 2 的幂分段，
+    每段再等分为 sub_buckets 个桶，相对误差不超过 1/sub_buckets。
+    记录的是非负整数（时间按微秒记录），内存只与出现过的桶数有关。
+    """
+
+    def __init__(self, sub_buckets: int = 64):
+        self.sub_bits = sub_buckets.bit_length() - 1
+        self.counts = Counter()
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def _bucket(self, value: int):
+        shift = max(value.bit_length() - self.sub_bits - 1, 0)
+        return shift, value >> shift
+
+    def record(self, value):
+        value = max(int(value), 0)
+        self.counts[self._bucket(value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """q 分位数的估计值（桶中点，不超过最大值）"""
+        if not self.count:
+            return 0.0
+        rank = max(q * self.count, 1)
+        seen = 0
+        for shift, sub in sorted(self.counts):
+            seen += self.counts[(shift, sub)]
+            if seen >= rank:
+                lower = sub << shift
+                return min(lower + ((1 << shift) - 1) / 2, self.max)
+        return float(self.max)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels: dict) -> str:
+    return ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+class RequestMetrics:
+    """按路由统计请求耗时、数据库耗时、查询次数与读取行数
+
+    before_request 时调用 begin_request()，after_request 时调用 end_request()；
+    InstrumentedCursor 在每次 execute 后调用 record_query()。
+    同一请求内相同 SQL（参数化前的语句）执行次数达到 n_plus_one_threshold 时记一次 N+1 并打印。
+    """
+
+    QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+    # 指标名 -> (说明, 单位换算)
+    SUMMARIES = {
+        'http_request_duration_seconds': ('请求耗时', 1e-6),
+        'db_time_seconds': ('每个请求的数据库耗时', 1e-6),
+        'db_queries_per_request': ('每个请求的查询次数', 1),
+        'db_rows_per_request': ('每个请求读取的行数', 1)
+    }
+
+    def __init__(self, n_plus_one_threshold: int = 5):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._lock = threading.Lock()
+        self._histograms = {}  # (指标名, endpoint) -> Histogram
+        self._requests = Counter()  # (endpoint, method, status) -> n
+        self._n_plus_one = Counter()  # endpoint -> n
+
+    def begin_request(self):
+        g._metrics = {
+            'started': time.perf_counter(),
+            'db_time': 0.0,
+            'queries': 0,
+            'rows': 0,
+            'statements': Counter()
+        }
+
+    def record_query(self, sql: str, duration: float, rows: int):
+        if not has_request_context():
+            return
+        current = g.get('_metrics')
+        if current is None:
+            return
+        current['db_time'] += duration
+        current['queries'] += 1
+        current['rows'] += rows
+        current['statements'][sql] += 1
+
+    def end_request(self, response):
+        current = g.pop('_metrics', None)
+        if current is None:
+            return response
+        elapsed = time.perf_counter() - current['started']
+        endpoint = request.endpoint or 'unmatched'
+
+        repeated = [(sql, n) for sql, n in current['statements'].items()
+                    if n >= self.n_plus_one_threshold]
+        for sql, n in repeated:
+            print(f"疑似 N+1 查询: {endpoint} 在一次请求中执行同一 SQL {n} 次: {' '.join(sql.split())[:200]}")
+
+        with self._lock:
+            for name, value in (('http_request_duration_seconds', elapsed * 1e6),
+                                ('db_time_seconds', current['db_time'] * 1e6),
+                                ('db_queries_per_request', current['queries']),
+                                ('db_rows_per_request', current['rows'])):
+                histogram = self._histograms.get((name, endpoint))
+                if histogram is None:
+                    histogram = self._histograms[(name, endpoint)] = Histogram()
+                histogram.record(value)
+            self._requests[(endpoint, request.method, response.status_code)] += 1
+            if repeated:
+                self._n_plus_one[endpoint] += len(repeated)
+        return response
+
+    def render_prometheus(self, gauges: dict = None) -> str:
+        """Prometheus 文本格式；gauges 为附加的 {指标名: 值}"""
+        lines = []
+        with self._lock:
+            for name, (help_text, scale) in self.SUMMARIES.items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} summary')
+                for (metric, endpoint), histogram in sorted(self._histograms.items()):
+                    if metric != name:
+                        continue
+                    labels = _labels({'endpoint': endpoint})
+                    for q in self.QUANTILES:
+                        value = histogram.quantile(q) * scale
+                        lines.append(f'{name}{{{labels},quantile="{q}"}} {value:.6g}')
+                    lines.append(f'{name}_sum{{{labels}}} {histogram.total * scale:.6g}')
+                    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+            lines.append('# HELP http_requests_total 请求次数')
+            lines.append('# TYPE http_requests_total counter')
+            for (endpoint, method, status), n in sorted(self._requests.items()):
+                labels = _labels({'endpoint': endpoint, 'method': method, 'status': status})
+                lines.append(f'http_requests_total{{{labels}}} {n}')
+
+            lines.append('# HELP db_n_plus_one_total 疑似 N+1 查询次数')
+            lines.append('# TYPE db_n_plus_one_total counter')
+            for endpoint, n in sorted(self._n_plus_one.items()):
+                lines.append(f'db_n_plus_one_total{{{_labels({"endpoint": endpoint})}}} {n}')
+
+        for name, value in (gauges or {}).items():
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+request_metrics = RequestMetrics(Config.N_PLUS_ONE_THRESHOLD)
+
+
+class InstrumentedCursor(DictCursor):
+    """记录每条语句耗时与读取行数的 DictCursor
+
+    连接池与 DAO 的连接都使用这个 cursorclass，所有 execute（含 executemany 内部）
+    都会经过这里；超过阈值的语句同时写入慢查询记录。
+    """
+
+    def execute(self, query, args=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, args)
+        finally:
+            duration = time.perf_counter() - started
+            rows = self.rowcount if self.description and self.rowcount > 0 else 0
+            request_metrics.record_query(query, duration, rows)
+            slow_query_log.record(self, query, args, duration, rows)
@@ -0,0 +1,71 @@
+from flask import request
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+# 带筛选条件时精确计数的上限，超过后只返回“N+”
+COUNT_CAP = 10000
+
+
+def get_page_args():
+    """从查询参数读取 ?after=<id>&limit=<n>"""
+    after = request.args.get('after', type=int)
+    limit = request.args.get('limit', DEFAULT_LIMIT, type=int)
+    limit = max(1, min(limit, MAX_LIMIT))
+    return after, limit
+
+
+def keyset_page(pool, select_sql: str, key: str, conditions=None, params=None,
+                after: int = None, limit: int = DEFAULT_LIMIT) -> dict:
+    """按主键倒序的游标分页
+
+    select_sql 为不含 WHERE/ORDER BY 的 SELECT ... FROM ... JOIN ... 语句，
+    key 为排序键（如 'sa.id'）。多取一行用于判断是否还有下一页。
+    返回 {'items', 'after', 'next_after', 'limit', 'has_more'}
+    """
+    conditions = list(conditions or [])
+    params = list(params or [])
+    if after is not None:
+        conditions.append(f'{key} < %s')
+        params.append(after)
+
+    sql = select_sql
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    sql += f' ORDER BY {key} DESC LIMIT %s'
+    params.append(limit + 1)
+
+    rows = list(pool.query_all(sql, params))
+    has_more = len(rows) > limit
+    items = rows[:limit]
+    return {
+        'items': items,
+        'after': after,
+        'next_after': items[-1]['id'] if has_more else None,
+        'limit': limit,
+        'has_more': has_more
+    }
+
+
+def estimate_table_rows(pool, table: str) -> int:
+    """读取 InnoDB 统计信息中的行数估计，不扫描表"""
+    row = pool.query_one('''
+        SELECT TABLE_ROWS AS estimate
+        FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    ''', (table,))
+    return int(row['estimate'] or 0) if row else 0
+
+
+def capped_count(pool, from_sql: str, conditions=None, params=None, cap: int = COUNT_CAP) -> dict:
+    """带筛选条件的计数，最多数到 cap 行
+
+    返回 {'total': n, 'exact': bool}；exact 为 False 时表示至少 n 行
+    """
+    sql = 'SELECT 1 ' + from_sql
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    sql = f'SELECT COUNT(*) AS total FROM ({sql} LIMIT %s) capped'
+    row = pool.query_one(sql, list(params or []) + [cap + 1])
+    total = row['total']
+    return {'total': min(total, cap), 'exact': total <= cap}
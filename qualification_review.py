@@ -0,0 +1,72 @@
+from db_pool import bulk_update
+
+REVIEW_STATUSES = ('已通过', '未通过')
+
+
+class QualificationReview:
+    """导师资格的批量审核
+
+    一次查询锁定并读取所有相关资格申请，在同一事务中批量更新审核结果，
+    再按结果批量更新导师的资格状态、评审等级与招生名额。
+    """
+
+    def __init__(self, pool, standards):
+        self.pool = pool
+        self.standards = standards
+
+    def review_many(self, items: list, reviewer_id: int) -> list:
+        """items 为 [(qual_id, status, comment), ...]，返回逐项结果
+
+        结果项 {'qual_id', 'ok', 'error'}；校验失败的项不影响其他项。
+        """
+        results = []
+        valid = []
+        for qual_id, status, comment in items:
+            if status not in REVIEW_STATUSES:
+                results.append({'qual_id': qual_id, 'ok': False, 'error': '无效的审核状态'})
+            else:
+                valid.append((qual_id, status, comment or ''))
+        if not valid:
+            return results
+
+        with self.pool.transaction_context() as cursor:
+            ids = [qual_id for qual_id, _, _ in valid]
+            placeholders = ', '.join(['%s'] * len(ids))
+            cursor.execute(f'''
+                SELECT id, teacher_id, review_level
+                FROM teacher_qualifications
+                WHERE id IN ({placeholders})
+                FOR UPDATE
+            ''', ids)
+            quals = {row['id']: row for row in cursor.fetchall()}
+
+            reviews, approved, rejected = [], {}, {}
+            for qual_id, status, comment in valid:
+                qual = quals.get(qual_id)
+                if not qual:
+                    results.append({'qual_id': qual_id, 'ok': False, 'error': '申请记录不存在'})
+                    continue
+                reviews.append((qual_id, status, comment, reviewer_id))
+                if status == '已通过':
+                    rejected.pop(qual['teacher_id'], None)
+                    approved[qual['teacher_id']] = (
+                        qual['teacher_id'], '已通过', qual['review_level'],
+                        self.standards.max_students(qual['review_level']))
+                else:
+                    approved.pop(qual['teacher_id'], None)
+                    rejected[qual['teacher_id']] = (qual['teacher_id'], '未通过', 0)
+                results.append({'qual_id': qual_id, 'ok': True, 'error': None})
+
+            if reviews:
+                bulk_update(cursor, 'teacher_qualifications', 'id',
+                            ['status', 'review_comment', 'reviewer_id'], reviews,
+                            extra_set='t.review_time = CURRENT_TIMESTAMP')
+            if approved:
+                bulk_update(cursor, 'teachers', 'id',
+                            ['qual_status', 'review_level', 'max_students'],
+                            list(approved.values()))
+            if rejected:
+                bulk_update(cursor, 'teachers', 'id',
+                            ['qual_status', 'max_students'], list(rejected.values()))
+
+        return results
@@ -0,0 +1,152 @@
+import json
+from collections import Counter
+from decimal import Decimal
+
+try:
+    import numpy as np
+except ImportError:  # 未安装 NumPy 时逐行计算
+    np = None
+
+from db_pool import bulk_update
+
+# 参与评分的数值字段；awards 为文本，只交给 qualification_dao.calculate_score
+SCORE_FIELDS = ('sci_papers', 'ei_papers', 'core_papers', 'national_projects',
+                'province_projects', 'other_projects', 'research_funds', 'students_count')
+
+
+def score_rows(rows, weights: dict):
+    """按列批量计算资格评分（“如果按新标准”预览用）
+
+    weights: {字段: (每项得分, 该项上限)}，需给出 SCORE_FIELDS 中全部字段
+    返回 [(score, score_detail), ...]
+    """
+    fields = list(weights)
+    if not rows:
+        return []
+
+    if np is None:
+        results = []
+        for row in rows:
+            detail = {f: min(float(row[f] or 0) * weights[f][0], weights[f][1]) for f in fields}
+            results.append((round(sum(detail.values()), 2), detail))
+        return results
+
+    values = np.array([[row[f] or 0 for f in fields] for row in rows], dtype=float)
+    per_unit = np.array([weights[f][0] for f in fields], dtype=float)
+    caps = np.array([weights[f][1] for f in fields], dtype=float)
+    detail = np.minimum(values * per_unit, caps)
+    scores = np.round(detail.sum(axis=1), 2)
+    return [(float(score), dict(zip(fields, row_detail.tolist())))
+            for score, row_detail in zip(scores, detail)]
+
+
+def level_rows(scores, levels: list):
+    """按阈值批量判定评审等级
+
+    levels: [(等级, 最低分), ...]，未达到任何等级为“不合格”
+    """
+    ordered = sorted(levels, key=lambda level: level[1])
+    names = ['不合格'] + [name for name, _ in ordered]
+    if np is None:
+        return [names[sum(1 for _, minimum in ordered if score >= minimum)] for score in scores]
+
+    # 阈值升序后用 searchsorted 一次求出所有等级
+    thresholds = np.array([minimum for _, minimum in ordered], dtype=float)
+    level_index = np.searchsorted(thresholds, np.array(scores, dtype=float), side='right')
+    return [names[index] for index in level_index]
+
+
+class QualificationScoring:
+    """导师资格的批量（重新）评分
+
+    一次查询加载当年全部资格申请，按主键批量写回（每块一条 UPDATE ... JOIN）。
+    评分与等级默认来自 qualification_dao.calculate_score / get_review_level，
+    与单条提交使用同一套评审标准；传入 weights / levels 时按列向量化计算，
+    只用于预览新标准下的等级分布（dry_run）。
+    已通过审核的申请等级变化时同步导师的评审等级，update_quota 时一并重设招生名额。
+    """
+
+    CHUNK_SIZE = 1000
+
+    def __init__(self, pool, qualification_dao, standards):
+        self.pool = pool
+        self.qualification_dao = qualification_dao
+        self.standards = standards
+
+    def load(self, year: int):
+        fields = ', '.join(SCORE_FIELDS)
+        return list(self.pool.query_all(f'''
+            SELECT id, teacher_id, status, score, review_level, awards, {fields}
+            FROM teacher_qualifications
+            WHERE YEAR(create_time) = %s
+        ''', (year,)))
+
+    def _standard_scores(self, rows):
+        results = []
+        for row in rows:
+            qual_data = {field: float(row[field]) if isinstance(row[field], Decimal) else row[field]
+                         for field in SCORE_FIELDS}
+            qual_data['awards'] = row['awards'] or ''
+            score_info = self.qualification_dao.calculate_score(qual_data)
+            results.append((float(score_info['score']), score_info['score_detail']))
+        return results
+
+    def _standard_levels(self, scores):
+        # 同分只判定一次
+        levels = {}
+        for score in scores:
+            if score not in levels:
+                levels[score] = self.qualification_dao.get_review_level(score)
+        return [levels[score] for score in scores]
+
+    def rescore(self, year: int, weights: dict = None, levels: list = None,
+                dry_run: bool = True, update_quota: bool = False) -> dict:
+        if (weights or levels) and not dry_run:
+            raise ValueError('自定义权重或等级只能预览，请先更新评审标准')
+
+        rows = self.load(year)
+        scored = score_rows(rows, weights) if weights else self._standard_scores(rows)
+        scores = [score for score, _ in scored]
+        new_levels = level_rows(scores, levels) if levels else self._standard_levels(scores)
+
+        changed = [
+            (row['id'], score,
+             detail if isinstance(detail, str) else json.dumps(detail, ensure_ascii=False),
+             level)
+            for row, (score, detail), level in zip(rows, scored, new_levels)
+            if row['review_level'] != level or row['score'] is None
+            or abs(float(row['score']) - score) > 1e-6
+        ]
+        # 导师的评审等级来自其已通过的资格申请
+        teachers = {
+            row['teacher_id']: level
+            for row, level in zip(rows, new_levels)
+            if row['status'] == '已通过' and row['review_level'] != level
+        }
+        report = {
+            'year': year,
+            'total': len(rows),
+            'changed': len(changed),
+            'level_changes': sum(1 for row, level in zip(rows, new_levels)
+                                 if row['review_level'] != level),
+            'current_distribution': dict(Counter(row['review_level'] for row in rows)),
+            'proposed_distribution': dict(Counter(new_levels)),
+            'teachers_changed': len(teachers),
+            'quota_updated': bool(teachers) and update_quota and not dry_run,
+            'dry_run': dry_run
+        }
+
+        if not dry_run and changed:
+            with self.pool.transaction_context() as cursor:
+                bulk_update(cursor, 'teacher_qualifications', 'id',
+                            ['score', 'score_detail', 'review_level'], changed,
+                            chunk_size=self.CHUNK_SIZE)
+                if teachers and update_quota:
+                    bulk_update(cursor, 'teachers', 'id', ['review_level', 'max_students'],
+                                [(teacher_id, level, self.standards.max_students(level))
+                                 for teacher_id, level in teachers.items()],
+                                chunk_size=self.CHUNK_SIZE)
+                elif teachers:
+                    bulk_update(cursor, 'teachers', 'id', ['review_level'],
+                                list(teachers.items()), chunk_size=self.CHUNK_SIZE)
+        return report
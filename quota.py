@@ -0,0 +1,257 @@
+import threading
+import time
+
+from quota_solver import allocate
+from application_jobs import APPLICATION_ACCEPTED
+
+
+class QuotaReservation:
+    """导师名额的原子预占
+
+    在同一事务中先锁定导师行、再锁定申请行（SELECT ... FOR UPDATE，
+    与 MatchingEngine 写回时的加锁顺序一致，避免相互死锁），
+    校验名额后录取当前申请，避免并发录取时先查后改导致的超招。
+    配置了任务队列时，拒绝该学生其他待处理申请、通知与日志作为后台任务
+    随同一事务写入；否则在事务内直接拒绝其他申请。
+    """
+
+    ACCEPTED = 'accepted'
+    NOT_FOUND = 'not_found'
+    NOT_PENDING = 'not_pending'
+    QUOTA_FULL = 'quota_full'
+    ALREADY_ADMITTED = 'already_admitted'
+
+    def __init__(self, pool, jobs=None):
+        self.pool = pool
+        self.jobs = jobs
+        self._lock = threading.Lock()
+        self._stats = {
+            'attempts': 0,
+            'accepted': 0,
+            'not_found': 0,
+            'not_pending': 0,
+            'quota_full': 0,
+            'already_admitted': 0,
+            'errors': 0,
+            'lock_wait_ms_total': 0.0,
+            'lock_wait_ms_max': 0.0
+        }
+
+    def accept(self, app_id: int, teacher_id: int, comment: str = '申请通过',
+               operator_id: int = None) -> dict:
+        """预占名额并录取申请，返回 {'status': ..., 'app': ...}"""
+        try:
+            with self.pool.transaction_context() as cursor:
+                started = time.perf_counter()
+                cursor.execute('''
+                    SELECT id, max_students FROM teachers
+                    WHERE id = %s
+                    FOR UPDATE
+                ''', (teacher_id,))
+                teacher = cursor.fetchone()
+                app = None
+                if teacher:
+                    cursor.execute('''
+                        SELECT sa.id, sa.student_id, sa.status, s.name AS student_name
+                        FROM student_applications sa
+                        JOIN students s ON s.id = sa.student_id
+                        WHERE sa.id = %s AND sa.teacher_id = %s
+                        FOR UPDATE
+                    ''', (app_id, teacher_id))
+                    app = cursor.fetchone()
+                self._record_wait((time.perf_counter() - started) * 1000)
+                if app:
+                    app['max_students'] = teacher['max_students']
+
+                if not app:
+                    status = self.NOT_FOUND
+                elif app['status'] != '待处理':
+                    status = self.NOT_PENDING
+                elif self._accepted_count(cursor, teacher_id) >= app['max_students']:
+                    status = self.QUOTA_FULL
+                elif self._admitted_elsewhere(cursor, app['student_id']):
+                    # 级联拒绝尚未执行时，其他申请仍是待处理状态
+                    status = self.ALREADY_ADMITTED
+                else:
+                    cursor.execute('''
+                        UPDATE student_applications
+                        SET status = '已通过',
+                            process_time = CURRENT_TIMESTAMP,
+                            process_comment = %s,
+                            approval_status = '待审批'
+                        WHERE id = %s
+                    ''', (comment, app_id))
+                    if self.jobs is not None:
+                        self.jobs.enqueue(APPLICATION_ACCEPTED, {
+                            'app_id': app_id,
+                            'student_id': app['student_id'],
+                            'teacher_id': teacher_id,
+                            'operator_id': operator_id
+                        }, cursor=cursor)
+                    else:
+                        cursor.execute('''
+                            UPDATE student_applications
+                            SET status = '未通过',
+                                process_time = CURRENT_TIMESTAMP,
+                                process_comment = '已被其他导师录取'
+                            WHERE student_id = %s AND id <> %s
+                            AND status = '待处理'
+                        ''', (app['student_id'], app_id))
+                    status = self.ACCEPTED
+        except Exception:
+            self._record(('attempts', 'errors'))
+            raise
+
+        if status == self.ACCEPTED and self.jobs is not None:
+            self.jobs.wake()
+        self._record(('attempts', status))
+        return {'status': status, 'app': app}
+
+    def _accepted_count(self, cursor, teacher_id: int) -> int:
+        """锁定读：导师已录取人数（读取最新提交的数据）"""
+        cursor.execute('''
+            SELECT COUNT(*) AS accepted
+            FROM student_applications
+            WHERE teacher_id = %s AND status = '已通过'
+            FOR UPDATE
+        ''', (teacher_id,))
+        return cursor.fetchone()['accepted']
+
+    def _admitted_elsewhere(self, cursor, student_id: int) -> bool:
+        """锁定读：该学生是否已有其他导师录取（读取最新提交的数据）"""
+        cursor.execute('''
+            SELECT COUNT(*) AS admitted
+            FROM student_applications
+            WHERE student_id = %s AND status = '已通过'
+            FOR UPDATE
+        ''', (student_id,))
+        return cursor.fetchone()['admitted'] > 0
+
+    def _record(self, keys):
+        with self._lock:
+            for key in keys:
+                self._stats[key] += 1
+
+    def _record_wait(self, wait_ms: float):
+        with self._lock:
+            self._stats['lock_wait_ms_total'] += wait_ms
+            self._stats['lock_wait_ms_max'] = max(self._stats['lock_wait_ms_max'], wait_ms)
+
+    def stats(self) -> dict:
+        """争用统计：名额已满/并发冲突次数与行锁等待时间"""
+        with self._lock:
+            stats = dict(self._stats)
+        contended = stats['quota_full'] + stats['not_pending'] + stats['already_admitted']
+        stats['contention_rate'] = contended / stats['attempts'] if stats['attempts'] else 0.0
+        stats['lock_wait_ms_avg'] = (stats['lock_wait_ms_total'] / stats['attempts']
+                                     if stats['attempts'] else 0.0)
+        return stats
+
+
+class QuotaDAO:
+    """导师名额的批量写入"""
+
+    CHUNK_SIZE = 1000
+
+    def __init__(self, pool, total_enrollments: int = None):
+        self.pool = pool
+        self.total_enrollments = total_enrollments
+
+    def batch_update(self, quotas: dict, year: int) -> int:
+        """在一个事务中批量更新名额 {teacher_id: max_students}，返回更新行数
+
+        同一事务内先锁定导师行并校验：名额不能小于已录取人数，
+        全部导师名额之和不能超过总招生数。校验失败时抛出 ValueError。
+        """
+        if not quotas:
+            return 0
+
+        with self.pool.transaction_context() as cursor:
+            cursor.execute('''
+                SELECT id, max_students
+                FROM teachers
+                FOR UPDATE
+            ''')
+            teachers = {row['id']: row for row in cursor.fetchall()}
+            # 锁定读：子查询中的计数是一致性读，可能落后于已提交的录取
+            cursor.execute('''
+                SELECT teacher_id, COUNT(*) AS accepted_count
+                FROM student_applications
+                WHERE status = '已通过'
+                GROUP BY teacher_id
+                FOR UPDATE
+            ''')
+            accepted = {row['teacher_id']: row['accepted_count'] for row in cursor.fetchall()}
+            for teacher_id, teacher in teachers.items():
+                teacher['accepted_count'] = accepted.get(teacher_id, 0)
+
+            problems = []
+            for teacher_id, max_students in quotas.items():
+                teacher = teachers.get(teacher_id)
+                if not teacher:
+                    problems.append(f'导师 {teacher_id} 不存在')
+                elif max_students < 0:
+                    problems.append(f'导师 {teacher_id} 的名额不能为负数')
+                elif max_students < teacher['accepted_count']:
+                    problems.append(
+                        f"导师 {teacher_id} 已录取 {teacher['accepted_count']} 人，名额不能少于已录取人数")
+
+            if self.total_enrollments is not None:
+                total = sum(quotas.get(tid, row['max_students'] or 0) for tid, row in teachers.items())
+                if total > self.total_enrollments:
+                    problems.append(f'名额合计 {total} 超过总招生数 {self.total_enrollments}')
+
+            if problems:
+                raise ValueError('；'.join(problems))
+
+            items = list(quotas.items())
+            updated = 0
+            for i in range(0, len(items), self.CHUNK_SIZE):
+                chunk = items[i:i + self.CHUNK_SIZE]
+                cases = ' '.join(['WHEN %s THEN %s'] * len(chunk))
+                placeholders = ', '.join(['%s'] * len(chunk))
+                params = [value for item in chunk for value in item]
+                params += [year] + [teacher_id for teacher_id, _ in chunk]
+                updated += cursor.execute(f'''
+                    UPDATE teachers
+                    SET max_students = CASE id {cases} END,
+                        quota_status = '已分配',
+                        quota_year = %s
+                    WHERE id IN ({placeholders})
+                ''', params)
+        return updated
+
+    def propose_allocation(self, total: int, standards) -> dict:
+        """根据总名额、评审等级上限与申请需求生成名额分配方案
+
+        每位导师的名额不少于已录取人数、不超过其评审等级的 max_students，
+        剩余名额按（待处理 + 已录取）申请数比例分配。
+        standards 为 StandardsRegistry。
+        返回 allocate() 的结果，并附带 'teachers' 明细。
+        """
+        teachers = self.pool.query_all('''
+            SELECT t.id, t.name, t.review_level, t.max_students,
+                   COALESCE(SUM(sa.status = '已通过'), 0) AS accepted_count,
+                   COALESCE(SUM(sa.status = '待处理'), 0) AS pending_count
+            FROM teachers t
+            LEFT JOIN student_applications sa ON sa.teacher_id = t.id
+            WHERE t.qual_status = '已通过'
+            GROUP BY t.id, t.name, t.review_level, t.max_students
+        ''')
+
+        inputs = []
+        for teacher in teachers:
+            upper = standards.max_students(teacher['review_level'])
+            accepted = int(teacher['accepted_count'])
+            inputs.append({
+                'id': teacher['id'],
+                'lower': accepted,
+                'upper': max(upper, accepted),
+                'weight': accepted + int(teacher['pending_count'])
+            })
+
+        result = allocate(total, inputs)
+        for teacher in teachers:
+            teacher['proposed'] = result['quotas'][teacher['id']]
+        result['teachers'] = teachers
+        return result
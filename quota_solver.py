@@ -0,0 +1,66 @@
+import math
+
+
+def _waterfill(remaining: float, items: list) -> dict:
+    """按权重比例分配 remaining，每项不超过其 room
+
+    items: [(id, weight, room)]，weight > 0。按 room/weight 升序依次判断
+    是否会被填满，填满的项取 room，其余按权重分配剩余量。O(n log n)。
+    """
+    shares = {}
+    items = sorted(items, key=lambda item: item[2] / item[1])
+    weight_sum = sum(weight for _, weight, _ in items)
+    for index, (tid, weight, room) in enumerate(items):
+        if remaining <= 0 or weight_sum <= 0:
+            break
+        if remaining / weight_sum >= room / weight:
+            shares[tid] = room
+            remaining -= room
+            weight_sum -= weight
+        else:
+            level = remaining / weight_sum
+            for rest_id, rest_weight, _ in items[index:]:
+                shares[rest_id] = level * rest_weight
+            break
+    return shares
+
+
+def allocate(total: int, teachers: list) -> dict:
+    """在上下界约束下按权重分配整数名额
+
+    teachers: [{'id', 'lower', 'upper', 'weight'}, ...]
+    先满足下界（已录取人数），剩余名额按权重比例注水分配，
+    达到上界的导师不再参与；权重为 0 的导师只分配其他导师分不完的名额。
+    最后按最大余数法取整。
+    返回 {'quotas': {id: n}, 'allocated': n, 'unallocated': n}
+    """
+    lower_total = sum(t['lower'] for t in teachers)
+    if total < lower_total:
+        raise ValueError(f'总名额 {total} 少于已录取人数合计 {lower_total}')
+
+    quotas = {t['id']: t['lower'] for t in teachers}
+    rooms = {t['id']: t['upper'] - t['lower'] for t in teachers if t['upper'] > t['lower']}
+    remaining = total - lower_total
+
+    shares = _waterfill(remaining, [(t['id'], t['weight'], rooms[t['id']])
+                                    for t in teachers if t['id'] in rooms and t['weight'] > 0])
+    leftover = remaining - sum(shares.values())
+    if leftover > 1e-9:
+        # 有需求的导师已满，剩余名额平均分给其他导师
+        extra = _waterfill(leftover, [(tid, 1, room - shares.get(tid, 0))
+                                      for tid, room in rooms.items()
+                                      if room - shares.get(tid, 0) > 1e-9])
+        for tid, share in extra.items():
+            shares[tid] = shares.get(tid, 0) + share
+
+    # 最大余数法取整
+    floors = {tid: math.floor(share + 1e-9) for tid, share in shares.items()}
+    leftover = round(sum(shares.values())) - sum(floors.values())
+    by_remainder = sorted(shares, key=lambda tid: shares[tid] - floors[tid], reverse=True)
+    for tid in by_remainder[:max(leftover, 0)]:
+        floors[tid] += 1
+    for tid, extra in floors.items():
+        quotas[tid] += extra
+
+    allocated = sum(quotas.values())
+    return {'quotas': quotas, 'allocated': allocated, 'unallocated': total - allocated}
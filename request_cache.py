@@ -0,0 +1,46 @@
+from functools import wraps
+
+from flask import g, has_request_context
+
+
+def _request_cache():
+    if '_request_cache' not in g:
+        g._request_cache = {}
+        g._request_cache_stats = {'hits': 0, 'misses': 0}
+    return g._request_cache
+
+
+def request_cached(f):
+    """请求内记忆化：同一请求中相同 (函数, 参数) 只执行一次
+
+    适用于模板过滤器与 Controller 中的只读查询；请求外调用时不缓存。
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not has_request_context():
+            return f(*args, **kwargs)
+
+        cache = _request_cache()
+        key = (f.__module__, f.__qualname__, args, tuple(sorted(kwargs.items())))
+        if key in cache:
+            g._request_cache_stats['hits'] += 1
+            return cache[key]
+
+        g._request_cache_stats['misses'] += 1
+        result = f(*args, **kwargs)
+        cache[key] = result
+        return result
+    return decorated_function
+
+
+def invalidate_request_cache():
+    """清空当前请求的缓存（在同一请求中发生写操作后调用）"""
+    if has_request_context():
+        g.pop('_request_cache', None)
+
+
+def request_cache_stats() -> dict:
+    """当前请求的命中/未命中次数"""
+    if not has_request_context() or '_request_cache_stats' not in g:
+        return {'hits': 0, 'misses': 0}
+    return dict(g._request_cache_stats)
@@ -0,0 +1,203 @@
+from collections import defaultdict
+
+try:
+    import numpy as np
+except ImportError:  # 未安装 NumPy 时逐行计算
+    np = None
+
+from config import Config
+from importer import RowError, parse_number, INITIAL_FULL_MARK, RETEST_FULL_MARK
+from db_pool import bulk_update
+
+# 成绩字段：(列名, 满分)
+SCORE_FIELDS = [
+    ('initial_score', INITIAL_FULL_MARK),  # 初试成绩 PreliminaryS
+    ('foreign_language', 100),             # 外语听力及口语 ForeignLanguageS
+    ('professional_knowledge', 100),       # 专业知识测试 ProfessionalKnowledgeS
+    ('comprehensive_interview', 100),      # 综合素质面试 ComprehensiveQualityInterviewScore
+    ('retest_score', RETEST_FULL_MARK)     # 复试总成绩 FinalInterviewS
+]
+
+# 复试科目，未给出复试总成绩时加权求和
+RETEST_PARTS = ('foreign_language', 'professional_knowledge', 'comprehensive_interview')
+
+SCORE_HEADER_ALIASES = {
+    'PreliminaryS': 'initial_score',
+    'ForeignLanguageS': 'foreign_language',
+    '外语听力及口语成绩': 'foreign_language',
+    'ProfessionalKnowledgeS': 'professional_knowledge',
+    '专业知识测试成绩': 'professional_knowledge',
+    'ComprehensiveQualityInterviewScore': 'comprehensive_interview',
+    '综合素质面试成绩': 'comprehensive_interview',
+    'FinalInterviewS': 'retest_score',
+    '复试总成绩': 'retest_score',
+    '报考专业': 'major',
+    '专业': 'major'
+}
+
+
+def compute_scores(rows, weights):
+    """向量化计算复试成绩与总成绩
+
+    rows 为已校验的成绩记录列表（缺失的成绩为 None）。
+    复试总成绩未直接给出时，按各复试科目加权得到；复试总成绩和各科目都没有时为 None。
+    总成绩 = 初试成绩折算百分制 × initial 权重 + 复试成绩（缺失按 0）× retest 权重。
+    返回 [(retest_score, total_score), ...]
+    """
+    if np is None:
+        return [_compute_one(row, weights) for row in rows]
+
+    def column(field):
+        return np.array([np.nan if row[field] is None else row[field] for row in rows],
+                        dtype=float)
+
+    parts = {field: column(field) for field in RETEST_PARTS}
+    has_parts = ~np.logical_and.reduce([np.isnan(values) for values in parts.values()])
+    weighted = sum(np.nan_to_num(values) * weights[field] for field, values in parts.items())
+    retest = column('retest_score')
+    retest = np.where(np.isnan(retest), np.where(has_parts, weighted, np.nan), retest)
+    initial = np.nan_to_num(column('initial_score'))
+    total = initial / 5 * weights['initial'] + np.nan_to_num(retest) * weights['retest']
+    return [(None if np.isnan(r) else float(r), float(t))
+            for r, t in zip(np.round(retest, 2), np.round(total, 2))]
+
+
+def _compute_one(row, weights):
+    retest = row['retest_score']
+    if retest is None and any(row[field] is not None for field in RETEST_PARTS):
+        retest = sum((row[field] or 0) * weights[field] for field in RETEST_PARTS)
+    total = (row['initial_score'] or 0) / 5 * weights['initial'] + (retest or 0) * weights['retest']
+    return (None if retest is None else round(retest, 2)), round(total, 2)
+
+
+def has_retest(record) -> bool:
+    """成绩单是否给出了复试成绩（总成绩或任一科目）"""
+    return record['retest_score'] is not None or any(
+        record[field] is not None for field in RETEST_PARTS)
+
+
+def rank_by_major(entries):
+    """按专业分组、总成绩降序排名，同分同名次"""
+    groups = defaultdict(list)
+    for entry in entries:
+        groups[entry['major'] or '未填写'].append(entry)
+
+    tables = {}
+    for major, group in groups.items():
+        group.sort(key=lambda e: -e['total_score'])
+        rank, previous = 0, None
+        for index, entry in enumerate(group, start=1):
+            if entry['total_score'] != previous:
+                rank, previous = index, entry['total_score']
+            entry['rank'] = rank
+        tables[major] = group
+    return tables
+
+
+class ScoreIngestor:
+    """初试/复试成绩批量导入
+
+    逐块读取成绩单并校验范围，向量化计算复试与总成绩，
+    按主键批量更新学生成绩（每块一条 UPDATE ... JOIN），
+    同时生成各专业的排名表。
+    """
+
+    CHUNK_SIZE = 1000
+
+    def __init__(self, pool, weights=None):
+        self.pool = pool
+        self.weights = weights or Config.SCORE_WEIGHTS
+
+    def parse(self, row):
+        row = {SCORE_HEADER_ALIASES.get(k, k): v for k, v in row.items()}
+        username = row.get('username', '')
+        if not username:
+            raise RowError('缺少username')
+        record = {'username': username, 'major': row.get('major', '')}
+        for field, full_mark in SCORE_FIELDS:
+            record[field] = parse_number(row, field, float, None, 0, full_mark)
+        if record['initial_score'] is None:
+            raise RowError('缺少initial_score')
+        return record
+
+    def run(self, rows) -> dict:
+        """导入成绩，返回更新数量、逐行错误与各专业排名表"""
+        result = {'updated': 0, 'failed': 0, 'errors': [], 'rankings': {}}
+        ranked = []
+        chunk = []
+
+        def fail(line_no, username, error):
+            result['failed'] += 1
+            result['errors'].append({'row': line_no, 'username': username, 'error': error})
+
+        for line_no, row in rows:
+            try:
+                chunk.append((line_no, self.parse(row)))
+            except RowError as e:
+                fail(line_no, row.get('username', ''), str(e))
+                continue
+            if len(chunk) >= self.CHUNK_SIZE:
+                ranked.extend(self._ingest_chunk(chunk, result, fail))
+                chunk = []
+
+        if chunk:
+            ranked.extend(self._ingest_chunk(chunk, result, fail))
+
+        result['rankings'] = rank_by_major(ranked)
+        return result
+
+    def _ingest_chunk(self, chunk, result, fail):
+        usernames = [record['username'] for _, record in chunk]
+        placeholders = ', '.join(['%s'] * len(usernames))
+        students = {row['username']: row for row in self.pool.query_all(f'''
+            SELECT s.id, s.retest_score, u.username
+            FROM students s
+            JOIN users u ON s.user_id = u.id
+            WHERE u.username IN ({placeholders})
+        ''', usernames)}
+
+        records = []
+        for line_no, record in chunk:
+            student = students.get(record['username'])
+            if not student:
+                fail(line_no, record['username'], '学生不存在')
+                continue
+            # 只有初试成绩时保留原有复试成绩，排名也按原复试成绩计算
+            record['has_retest'] = has_retest(record)
+            if not record['has_retest']:
+                current = student['retest_score']
+                record['retest_score'] = None if current is None else float(current)
+            records.append((line_no, record))
+        if not records:
+            return []
+
+        scores = compute_scores([record for _, record in records], self.weights)
+        with_retest, initial_only = [], []
+        for (_, record), (retest, _) in zip(records, scores):
+            student_id = students[record['username']]['id']
+            if record['has_retest']:
+                with_retest.append((student_id, record['initial_score'], retest))
+            else:
+                initial_only.append((student_id, record['initial_score']))
+
+        try:
+            with self.pool.transaction_context() as cursor:
+                if with_retest:
+                    bulk_update(cursor, 'students', 'id', ['initial_score', 'retest_score'],
+                                with_retest)
+                if initial_only:
+                    bulk_update(cursor, 'students', 'id', ['initial_score'], initial_only)
+        except Exception as e:
+            print(f"成绩导入写入失败: {e}")
+            for line_no, record in records:
+                fail(line_no, record['username'], f'写入失败：{e}')
+            return []
+
+        result['updated'] += len(records)
+        return [{
+            'username': record['username'],
+            'major': record['major'],
+            'initial_score': record['initial_score'],
+            'retest_score': retest,
+            'total_score': total
+        } for (_, record), (retest, total) in zip(records, scores)]
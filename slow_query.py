@@ -0,0 +1,135 @@
+import re
+import sys
+import threading
+import time
+from collections import deque
+
+from pymysql.cursors import DictCursor
+
+from config import Config
+
+# 折叠空白与变长的 IN (%s, %s, ...)，使同一语句的不同调用归为一类
+_WHITESPACE = re.compile(r'\s+')
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)', re.IGNORECASE)
+_UNION_ROWS = re.compile(r'(?: UNION ALL SELECT (?:%s, )*%s)+', re.IGNORECASE)
+
+# 记录调用方时跳过的模块
+_INTERNAL_FILES = ('slow_query.py', 'metrics.py', 'db_pool.py', 'contextlib.py')
+
+
+def fingerprint(sql: str) -> str:
+    sql = _WHITESPACE.sub(' ', sql).strip()
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _UNION_ROWS.sub(' UNION ALL ...', sql)
+
+
+def _caller() -> str:
+    """最近的 Controller 方法（如 AdminController.get_logs），找不到时取第一个业务代码位置"""
+    frame = sys._getframe(2)
+    fallback = None
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.endswith('_controller.py'):
+            owner = frame.f_locals.get('self')
+            name = frame.f_code.co_name
+            return f'{type(owner).__name__}.{name}' if owner is not None else name
+        if (fallback is None and 'pymysql' not in filename
+                and not filename.endswith(_INTERNAL_FILES)):
+            fallback = f"{filename.rsplit('/', 1)[-1]}:{frame.f_code.co_name}:{frame.f_lineno}"
+        frame = frame.f_back
+    return fallback or 'unknown'
+
+
+def _short_params(args, limit: int = 20):
+    if args is None:
+        return None
+    if isinstance(args, dict):
+        return {key: repr(value)[:100] for key, value in list(args.items())[:limit]}
+    args = list(args) if isinstance(args, (list, tuple)) else [args]
+    shown = [repr(value)[:100] for value in args[:limit]]
+    if len(args) > limit:
+        shown.append(f'...（共 {len(args)} 个参数）')
+    return shown
+
+
+class SlowQueryLog:
+    """慢查询记录
+
+    执行时间超过 threshold_ms 的语句连同参数、耗时、读取行数和调用的 Controller 方法
+    存入容量为 capacity 的环形缓冲区；同类语句（按 fingerprint 归类）第一次变慢时
+    可选地在同一连接上执行 EXPLAIN 并保存执行计划。按类累计的次数与耗时用于找出最值得建索引的语句。
+    """
+
+    MAX_FINGERPRINTS = 1000
+
+    def __init__(self, threshold_ms: float = 200, capacity: int = 200, explain: bool = True):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self._entries = deque(maxlen=capacity)
+        self._by_fingerprint = {}  # fingerprint -> 汇总
+        self._lock = threading.Lock()
+
+    def record(self, cursor, sql: str, args, duration: float, rows: int = 0):
+        duration_ms = duration * 1000
+        if duration_ms < self.threshold_ms:
+            return
+
+        key = fingerprint(sql)
+        with self._lock:
+            summary = self._by_fingerprint.get(key)
+            # 类别数达到上限后，新出现的语句只进环形缓冲区，不再执行 EXPLAIN
+            first = summary is None and len(self._by_fingerprint) < self.MAX_FINGERPRINTS
+            if first:
+                summary = self._by_fingerprint[key] = {
+                    'fingerprint': key, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'plan': None}
+            if summary is not None:
+                summary['count'] += 1
+                summary['total_ms'] += duration_ms
+                summary['max_ms'] = max(summary['max_ms'], duration_ms)
+
+        plan = None
+        if first and self.explain and key[:6].upper() == 'SELECT':
+            plan = self._explain(cursor, sql, args)
+            if summary is not None:
+                summary['plan'] = plan
+
+        entry = {
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'duration_ms': round(duration_ms, 2),
+            'rows': rows,
+            'caller': _caller(),
+            'sql': ' '.join(sql.split()),
+            'params': _short_params(args),
+            'explain': plan
+        }
+        with self._lock:
+            self._entries.append(entry)
+
+    def _explain(self, cursor, sql, args):
+        """在同一连接上用普通 DictCursor 执行 EXPLAIN（不再经过计时与慢查询记录）"""
+        try:
+            with cursor.connection.cursor(DictCursor) as explain_cursor:
+                explain_cursor.execute('EXPLAIN ' + sql, args)
+                return explain_cursor.fetchall()
+        except Exception as e:
+            return [{'error': repr(e)}]
+
+    def entries(self) -> list:
+        """最近的慢查询，新的在前"""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def top(self, limit: int = 20) -> list:
+        """按累计耗时排序的慢查询类别"""
+        with self._lock:
+            summaries = [dict(summary) for summary in self._by_fingerprint.values()]
+        summaries.sort(key=lambda summary: summary['total_ms'], reverse=True)
+        return summaries[:limit]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_fingerprint.clear()
+
+
+slow_query_log = SlowQueryLog(**Config.SLOW_QUERY)
@@ -0,0 +1,64 @@
+import threading
+import time
+from types import MappingProxyType
+
+# 评审等级与 get_standards() 键名的对应
+LEVEL_KEYS = {
+    '优秀': 'excellent',
+    '良好': 'good',
+    '合格': 'qualified',
+    '不合格': 'unqualified'
+}
+
+
+class StandardsRegistry:
+    """导师资格评审标准的进程内缓存
+
+    通过 loader（qualification_dao.get_standards）加载，并预先建立
+    等级 -> max_students 的映射，二者作为一个不可变快照整体替换。
+    本进程内标准变更后调用 invalidate()；其他进程的快照在 ttl 秒后过期重新加载。
+    """
+
+    def __init__(self, loader, ttl: float = 60):
+        self._loader = loader
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._snapshot = None  # (过期时间, 标准, 名额映射)
+
+    def _ensure_loaded(self):
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot[0] > time.monotonic():
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot[0] > time.monotonic():
+                return snapshot
+            standards = self._loader()
+            max_students = {}
+            for key, standard in standards.items():
+                max_students[key] = standard['max_students']
+            for level, key in LEVEL_KEYS.items():
+                if key in max_students:
+                    max_students[level] = max_students[key]
+            snapshot = (time.monotonic() + self.ttl, MappingProxyType(standards),
+                        MappingProxyType(max_students))
+            self._snapshot = snapshot
+            return snapshot
+
+    def get(self):
+        """完整的评审标准（与 get_standards() 结构相同，只读）"""
+        return self._ensure_loaded()[1]
+
+    def max_students(self, review_level) -> int:
+        """评审等级（中文或英文键名）对应的招生名额上限，未知等级按不合格处理"""
+        max_students = self._ensure_loaded()[2]
+        if review_level in max_students:
+            return max_students[review_level]
+        if review_level and review_level.lower() in max_students:
+            return max_students[review_level.lower()]
+        return max_students.get('unqualified', 0)
+
+    def invalidate(self):
+        """评审标准变更后调用"""
+        with self._lock:
+            self._snapshot = None
@@ -0,0 +1,94 @@
+class StatsDAO:
+    """统计类查询：计数与 Top-N 在数据库端完成，不再拉取整表"""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def get_dashboard_stats(self, activity_limit: int = 5) -> dict:
+        """一次 UNION 查询返回仪表盘计数与最近活动
+
+        返回 {'total_students', 'total_teachers', 'pending_qualifications',
+              'activities': [{'time', 'type', 'details'}, ...]}
+        """
+        sql = '''
+            SELECT 'stat' AS kind, 'total_students' AS name, COUNT(*) AS value,
+                   NULL AS time, NULL AS type, NULL AS details
+            FROM students
+            UNION ALL
+            SELECT 'stat', 'total_teachers', COUNT(*), NULL, NULL, NULL
+            FROM teachers
+            UNION ALL
+            SELECT 'stat', 'pending_qualifications', COUNT(*), NULL, NULL, NULL
+            FROM teacher_qualifications
+            WHERE status = '待审核'
+            UNION ALL
+            (SELECT 'activity', NULL, NULL, sa.create_time, '志愿申请',
+                    CONCAT(s.name, ' 申请了 ', t.name, ' 导师')
+             FROM student_applications sa
+             JOIN students s ON sa.student_id = s.id
+             JOIN teachers t ON sa.teacher_id = t.id
+             ORDER BY sa.create_time DESC
+             LIMIT %s)
+            UNION ALL
+            (SELECT 'activity', NULL, NULL, q.create_time, '资格申请',
+                    CONCAT(t.name, ' 提交了 ', t.title, ' 导师资格申请')
+             FROM teacher_qualifications q
+             JOIN teachers t ON q.teacher_id = t.id
+             ORDER BY q.create_time DESC
+             LIMIT %s)
+        '''
+        rows = self.pool.query_all(sql, (activity_limit, activity_limit))
+
+        stats = {'activities': []}
+        for row in rows:
+            if row['kind'] == 'stat':
+                stats[row['name']] = row['value']
+            else:
+                stats['activities'].append({
+                    'time': row['time'],
+                    'type': row['type'],
+                    'details': row['details']
+                })
+        stats['activities'].sort(key=lambda x: x['time'], reverse=True)
+        return stats
+
+    def get_application_stats(self) -> dict:
+        """一次 GROUP BY 查询返回申请的各状态、各审批状态计数
+
+        返回 {'total', 'by_status': {status: n}, 'by_approval': {approval_status: n},
+              'pending_reviews', 'pending_approvals'}
+        """
+        rows = self.pool.query_all('''
+            SELECT status, approval_status, COUNT(*) AS cnt
+            FROM student_applications
+            GROUP BY status, approval_status
+        ''')
+
+        stats = {'total': 0, 'by_status': {}, 'by_approval': {}, 'pending_approvals': 0}
+        for row in rows:
+            stats['total'] += row['cnt']
+            stats['by_status'][row['status']] = stats['by_status'].get(row['status'], 0) + row['cnt']
+            if row['status'] == '已通过':
+                approval = row['approval_status']
+                stats['by_approval'][approval] = stats['by_approval'].get(approval, 0) + row['cnt']
+                if approval == '待审批':
+                    stats['pending_approvals'] += row['cnt']
+        stats['pending_reviews'] = stats['by_status'].get('待处理', 0)
+        return stats
+
+    def get_admission_stats(self) -> dict:
+        """录取审批页的统计，一次条件聚合查询
+
+        范围与 ListDAO.get_admissions_page 一致（导师已通过的申请），
+        返回 {'total', 'approved', 'pending', 'approval_passed', 'approval_rejected'}
+        """
+        row = self.pool.query_one('''
+            SELECT COUNT(*) AS total,
+                   COALESCE(SUM(status = '已通过'), 0) AS approved,
+                   COALESCE(SUM(approval_status = '待审批'), 0) AS pending,
+                   COALESCE(SUM(approval_status = '已通过'), 0) AS approval_passed,
+                   COALESCE(SUM(approval_status = '未通过'), 0) AS approval_rejected
+            FROM student_applications
+            WHERE status = '已通过'
+        ''')
+        return {key: int(value) for key, value in row.items()}
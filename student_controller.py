@@ -1,11 +1,13 @@
 from flask import session, request, flash, redirect, url_for, render_template
 from .base_controller import BaseController
+from application_rules import Rejection, REJECTION_MESSAGES, validate_application, rejection_from_error
+from request_cache import invalidate_request_cache
 
 class StudentController(BaseController):
     def get_profile(self):
         try:
             # 获取学生信息
-            student = self.dao_factory.student_dao.get_by_user_id(session['user_id'])
+            student = self.current_student()
             
             if request.method == 'POST':
                 # 更新学生信息
@@ -15,6 +17,7 @@ class StudentController(BaseController):
                     'email': request.form.get('email', '')
                 }
                 self.dao_factory.student_dao.update(student['id'], student_data)
+                self.invalidate_profile('student', session['user_id'])
                 flash('个人信息更新成功')
                 return redirect(url_for('student_profile'))
             
@@ -25,7 +28,7 @@ class StudentController(BaseController):
     def get_teachers(self):
         try:
             # 获取学生信息
-            student = self.dao_factory.student_dao.get_by_user_id(session['user_id'])
+            student = self.current_student()
             if not student:
                 flash('请先完善个人信息')
                 return redirect(url_for('student_profile'))
@@ -49,7 +52,7 @@ class StudentController(BaseController):
     def get_results(self):
         try:
             # 获取学生申请结果
-            student = self.dao_factory.student_dao.get_by_user_id(session['user_id'])
+            student = self.current_student()
             applications = self.dao_factory.student_dao.get_applications(student['id'])
             return render_template('student/results.html', applications=applications)
         except Exception as e:
@@ -57,64 +60,49 @@ class StudentController(BaseController):
     
     def apply_teacher(self, teacher_id):
         try:
-            # 检查学生信息
-            student = self.dao_factory.student_dao.get_by_user_id(session['user_id'])
-            if not student:
-                flash('请先完善个人信息')
-                return redirect(url_for('student_profile'))
-            
-            # 检查学生状态
-            if student['status'] != '已通过':
-                flash('您的考生资格还未通过审核，暂时无法申请导师')
-                return redirect(url_for('index'))
-            
-            # 检查导师是否可以申请
-            teacher = self.dao_factory.teacher_dao.get_by_id(teacher_id)
-            if not teacher or teacher['qual_status'] != '已通过':
-                flash('该导师暂不可申请')
-                return redirect(url_for('index'))
-            
-            # 检查申请数量
-            app_count = self.dao_factory.student_dao.check_application_count(student['id'])
-            if app_count >= 3:
-                flash('最多只能申请3个志愿')
-                return redirect(url_for('index'))
+            eligibility_dao = self.dao_factory.eligibility_dao
             
-            # 检查是否已申请过该导师
-            existing_app = self.dao_factory.application_dao.get_by_student_teacher(
-                student['id'], teacher_id)
-            if existing_app:
-                flash('您已申请过该导师')
-                return redirect(url_for('index'))
-            
-            # 创建申请
             try:
-                self.dao_factory.application_dao.create(
-                    student_id=student['id'],
-                    teacher_id=teacher_id,
-                    priority=int(request.form['priority']),
-                    personal_statement=request.form.get('personal_statement', ''),
-                    research_interest=request.form.get('research_interest', ''),
-                    apply_reason=request.form.get('apply_reason', '')
-                )
-                flash('申请提交成功')
-            except Exception as e:
-                error_msg = str(e)
-                if 'check_application_priority' in error_msg:
-                    if '必须先提交第一志愿' in error_msg:
-                        flash('请先提交第一志愿申请')
-                    elif '请等待当前志愿审核完成' in error_msg:
-                        flash('请等待当前志愿审核完成后再提交新申请')
-                    elif '已有志愿被通过' in error_msg:
-                        flash('您已有志愿被通过，不能继续申请')
-                    elif '请按顺序提交志愿' in error_msg:
-                        flash('请按照��愿顺序依次提交申请')
-                    elif '最多只能申请三个志愿' in error_msg:
-                        flash('最多只能申请三个志愿')
+                priority = int(request.form['priority'])
+            except (KeyError, ValueError):
+                priority = None
+            
+            with self.dao_factory.pool.transaction_context() as cursor:
+                # 一次查询完成学生、导师、申请数量与重复申请检查
+                eligibility = eligibility_dao.check(cursor, session['user_id'], teacher_id)
+                
+                # 在应用层校验志愿规则，不合规的申请不再提交到数据库
+                rejection = validate_application(eligibility, priority)
+                if rejection == Rejection.NO_PROFILE:
+                    flash(REJECTION_MESSAGES[rejection])
+                    return redirect(url_for('student_profile'))
+                if rejection:
+                    flash(REJECTION_MESSAGES[rejection])
+                    return redirect(url_for('index'))
+                
+                # 在同一事务中创建申请，触发器仍作为并发情况下的兜底
+                try:
+                    eligibility_dao.create_application(
+                        cursor,
+                        student_id=eligibility['student_id'],
+                        teacher_id=teacher_id,
+                        priority=priority,
+                        personal_statement=request.form.get('personal_statement', ''),
+                        research_interest=request.form.get('research_interest', ''),
+                        apply_reason=request.form.get('apply_reason', '')
+                    )
+                    # 可申请的志愿顺序已变化，丢弃本请求内的缓存结果
+                    invalidate_request_cache()
+                    flash('申请提交成功')
+                except Exception as e:
+                    rejection = rejection_from_error(e)
+                    if rejection is None:
+                        raise e
+                    if rejection == Rejection.UNKNOWN:
+                        flash('申请提交失败：' + str(e))
                     else:
-                        flash('申请提交失败：' + error_msg)
+                        flash(REJECTION_MESSAGES[rejection])
                     return redirect(url_for('index'))
-                raise e
                 
         except Exception as e:
             return self.handle_error(e, '申请提交失败', 'index')
@@ -133,6 +121,7 @@ class StudentController(BaseController):
             
             # 删除申请记录
             self.dao_factory.application_dao.delete(app_id)
+            invalidate_request_cache()
             
             return '', 204
         except Exception as e:
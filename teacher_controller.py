@@ -1,13 +1,20 @@
 from flask import session, request, flash, redirect, url_for, render_template
 from .base_controller import BaseController
+from quota import QuotaReservation
+from cache import catalogue_cache
+from application_jobs import APPLICATION_REJECTED
 import random
 from datetime import datetime
 
 class TeacherController(BaseController):
+    def __init__(self, dao_factory):
+        super().__init__(dao_factory)
+        self.quota = dao_factory.quota_reservation
+    
     def get_profile(self):
         try:
             # 获取教师信息
-            teacher = self.dao_factory.teacher_dao.get_by_user_id(session['user_id'])
+            teacher = self.current_teacher()
             if request.method == 'POST':
                 # 更新教师信息
                 self.dao_factory.teacher_dao.update_profile(
@@ -17,6 +24,8 @@ class TeacherController(BaseController):
                         'research_direction': request.form['research_direction']
                     }
                 )
+                self.invalidate_profile('teacher', session['user_id'])
+                catalogue_cache.invalidate()
                 flash('个人信息更新成功')
             
             return render_template('teacher/profile.html', teacher=teacher)
@@ -26,7 +35,7 @@ class TeacherController(BaseController):
     def get_students(self):
         try:
             # 获取教师信息和名额情况
-            teacher = self.dao_factory.teacher_dao.get_by_user_id(session['user_id'])
+            teacher = self.current_teacher()
             if not teacher:
                 flash('导师信息不存在')
                 return redirect(url_for('teacher_profile'))
@@ -43,46 +52,23 @@ class TeacherController(BaseController):
     def accept_student(self, app_id):
         """接受学生申请"""
         try:
-            # 获取申请信息
-            app = self.dao_factory.application_dao.get_by_id(app_id)
-            if not app:
-                flash('申请不存在')
-                return redirect(url_for('teacher_students'))
+            teacher_id = session.get('teacher_id')
+            if not teacher_id:
+                teacher_id = self.current_teacher()['id']
             
-            # 检查名额
-            teacher = self.dao_factory.teacher_dao.get_by_user_id(session['user_id'])
-            current_count = self.dao_factory.teacher_dao.check_student_count(teacher['id'])
+            # 在同一事务中校验名额并录取申请，级联拒绝与通知由后台任务完成
+            result = self.quota.accept(app_id, teacher_id, operator_id=session['user_id'])
             
-            if current_count >= teacher['max_students']:
+            if result['status'] == QuotaReservation.NOT_FOUND:
+                flash('申请不存在')
+            elif result['status'] == QuotaReservation.NOT_PENDING:
+                flash('该申请已被处理')
+            elif result['status'] == QuotaReservation.QUOTA_FULL:
                 flash('您的招生名额已满')
-                return redirect(url_for('teacher_students'))
-            
-            # 使用事务处理申请
-            with self.dao_factory.application_dao.transaction_context() as cursor:
-                # 更新当前申请状态
-                sql = '''
-                    UPDATE student_applications 
-                    SET status = '已通过',
-                        process_time = CURRENT_TIMESTAMP,
-                        process_comment = %s,
-                        approval_status = '待审批'
-                    WHERE id = %s
-                '''
-                cursor.execute(sql, ('申请通过', app_id))
-                
-                # 拒绝该学生的其他申请
-                sql = '''
-                    UPDATE student_applications 
-                    SET status = '未通过',
-                        process_time = CURRENT_TIMESTAMP,
-                        process_comment = '已被其他导师录取'
-                    WHERE student_id = %s 
-                    AND id != %s
-                    AND status = '待处理'
-                '''
-                cursor.execute(sql, (app['student_id'], app_id))
-            
-            flash(f'已接受 {app["student_name"]} 的申请')
+            elif result['status'] == QuotaReservation.ALREADY_ADMITTED:
+                flash('该学生已被其他导师录取')
+            else:
+                flash(f'已接受 {result["app"]["student_name"]} 的申请')
         except Exception as e:
             return self.handle_error(e, '操作失败', 'teacher_students')
         
@@ -96,9 +82,20 @@ class TeacherController(BaseController):
                 flash('申请不存在')
                 return redirect(url_for('teacher_students'))
             
-            # 更新申请状态
-            self.dao_factory.application_dao.update_status(
-                app_id, '未通过', '申请未通过')
+            # 更新申请状态；通知与日志的后台任务随同一事务提交
+            with self.dao_factory.pool.transaction_context() as cursor:
+                cursor.execute('''
+                    UPDATE student_applications
+                    SET status = '未通过',
+                        process_time = CURRENT_TIMESTAMP,
+                        process_comment = %s
+                    WHERE id = %s
+                ''', ('申请未通过', app_id))
+                self.dao_factory.jobs.enqueue(APPLICATION_REJECTED, {
+                    'app_id': app_id,
+                    'operator_id': session['user_id']
+                }, cursor=cursor)
+            self.dao_factory.jobs.wake()
             
             flash(f'已拒绝 {app["student_name"]} 的申请')
         except Exception as e:
@@ -122,7 +119,7 @@ class TeacherController(BaseController):
             }
             
             # 获取教师信息
-            teacher = self.dao_factory.teacher_dao.get_by_user_id(session['user_id'])
+            teacher = self.current_teacher()
             if not teacher:
                 flash('导师信息不存在')
                 return redirect(url_for('teacher_profile'))
@@ -153,7 +150,7 @@ class TeacherController(BaseController):
     def get_draw_lots(self):
         try:
             # 获取教师信息
-            teacher = self.dao_factory.teacher_dao.get_by_user_id(session['user_id'])
+            teacher = self.current_teacher()
             if not teacher:
                 flash('导师信息不存在')
                 return redirect(url_for('teacher_profile'))